@@ -6,6 +6,7 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    storage_backend: str = Field(default="mongo")
     mongodb_uri: str = Field(default="mongodb://localhost:27017")
     database_name: str = Field(default="spacio")
     jwt_secret: str = Field(default="super-secret-key")
@@ -17,6 +18,29 @@ class Settings(BaseSettings):
     stripe_secret_key: str = Field(default="")
     stripe_publishable_key: str = Field(default="")
     frontend_url: str = Field(default="http://localhost:5173")
+    admin_token: str = Field(default="")
+    hold_sweep_enabled: bool = Field(default=True)
+    hold_sweep_interval_seconds: float = Field(default=60.0)
+    hold_sweep_batch_size: int = Field(default=500)
+    user_cache_max_entries: int = Field(default=10_000)
+    user_cache_ttl_seconds: float = Field(default=30.0)
+    password_hash_executor: str = Field(default="thread")
+    password_hash_workers: int = Field(default=4)
+    password_hash_queue_timeout_seconds: float = Field(default=2.0)
+    message_broker: str = Field(default="local")
+    catalog_max_age_seconds: float = Field(default=300.0)
+    pricing_cache_max_entries: int = Field(default=50_000)
+    pricing_cache_ttl_seconds: float = Field(default=300.0)
+    upload_dir: str = Field(default="uploads")
+    max_upload_bytes: int = Field(default=10 * 1024 * 1024)
+    image_dir: str = Field(default="images")
+    image_workers: int = Field(default=2)
+    derived_dir: str = Field(default="derived")
+    slow_query_ms: float = Field(default=100.0)
+    slow_query_explain_sample_rate: float = Field(default=0.1)
+    slow_query_max_shapes: int = Field(default=500)
+    profile_sample_rate: float = Field(default=0.0)
+    profile_buffer_size: int = Field(default=20)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,237 @@
+"""In-process request and MongoDB metrics, rendered in Prometheus text format.
+
+`MetricsMiddleware` records latency, status codes and in-flight requests per
+route template; `CommandMetrics` is a pymongo command listener recording
+per-collection command durations and document counts. Both write into the
+module-level `registry`, which `/metrics` renders.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# ASGI scope of the request being handled; Motor copies it into its driver threads,
+# so command listeners can attribute work to a route.
+current_scope: ContextVar[Optional[Scope]] = ContextVar("current_scope", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(LATENCY_BUCKETS) and value > LATENCY_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, labels: Labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name][labels] += amount
+
+    def add_gauge(self, name: str, labels: Labels, amount: float) -> None:
+        with self._lock:
+            self.gauges[name][labels] += amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms[name].get(labels)
+            if histogram is None:
+                histogram = self.histograms[name][labels] = Histogram()
+            histogram.observe(value)
+
+    def render(self, extra: Optional[Dict[str, dict]] = None) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted(series):
+                    _header(lines, name, kind, self.help.get(name))
+                    for labels, value in sorted(series[name].items()):
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            for name in sorted(self.histograms):
+                _header(lines, name, "histogram", self.help.get(name))
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + (math.inf,), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.total)}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for component, values in sorted((extra or {}).items()):
+            for key, value in _flatten(values):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"spacio_{_snake(component)}_{_snake(key)}"
+                _header(lines, name, "gauge", None)
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], name: str, kind: str, text: Optional[str]) -> None:
+    if text:
+        lines.append(f"# HELP {name} {text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _snake(key: str) -> str:
+    return "".join(f"_{c.lower()}" if c.isupper() else c for c in key).lstrip("_")
+
+
+def _flatten(values: dict, prefix: str = "") -> Iterable[Tuple[str, object]]:
+    for key, value in values.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        else:
+            yield name, value
+
+
+registry = Registry()
+registry.describe("http_requests_total", "HTTP responses by route template and status code.")
+registry.describe("http_request_duration_seconds", "HTTP request latency by route template.")
+registry.describe("http_requests_in_flight", "HTTP requests currently being handled.")
+registry.describe("mongo_commands_total", "MongoDB commands by collection, command and outcome.")
+registry.describe("mongo_command_duration_seconds", "MongoDB command latency by collection and command.")
+registry.describe("mongo_documents_total", "Documents returned or written by MongoDB commands.")
+
+
+def current_route() -> Optional[str]:
+    scope = current_scope.get()
+    return route_label(scope) if scope is not None else None
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    if scope.get("root_path") and scope.get("app_root_path", scope["root_path"]) != scope["root_path"]:
+        return f"{scope['root_path']}/{{path}}"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; the route template is read from the scope after routing."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = (("method", method),)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.add_gauge("http_requests_in_flight", in_flight, 1)
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_scope.reset(token)
+            elapsed = time.perf_counter() - start
+            registry.add_gauge("http_requests_in_flight", in_flight, -1)
+            route = route_label(scope)
+            registry.inc("http_requests_total", (("method", method), ("route", route), ("status", str(status))))
+            registry.observe("http_request_duration_seconds", (("method", method), ("route", route)), elapsed)
+
+
+def command_target(event: monitoring.CommandStartedEvent) -> str:
+    if event.command_name == "getMore":
+        return str(event.command.get("collection", ""))
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+def reply_documents(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records command latency and document counts; events arrive on driver threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = command_target(event)
+
+    def _finish(self, event, outcome: str) -> Tuple[str, str]:
+        with self._lock:
+            collection = self._pending.pop((event.connection_id, event.request_id), "")
+        labels = (("collection", collection), ("command", event.command_name))
+        registry.inc("mongo_commands_total", labels + (("outcome", outcome),))
+        registry.observe("mongo_command_duration_seconds", labels, event.duration_micros / 1e6)
+        return labels
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        labels = self._finish(event, "success")
+        documents = reply_documents(event.command_name, event.reply)
+        if documents:
+            registry.inc("mongo_documents_total", labels, documents)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failure")
+
+
+command_metrics = CommandMetrics()
@@ -0,0 +1,36 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(key: Any, doc_id: str) -> str:
+    if isinstance(key, datetime):
+        payload = {"d": key.isoformat(), "id": doc_id}
+    else:
+        payload = {"k": key, "id": doc_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        doc_id = payload["id"]
+        if "d" in payload:
+            key = datetime.fromisoformat(payload["d"])
+        else:
+            key = payload["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(doc_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key, doc_id
+
+
+def keyset_filter(field: str, key: Any, doc_id: str, descending: bool = False) -> dict:
+    op = "$lt" if descending else "$gt"
+    return {"$or": [{field: {op: key}}, {field: key, "_id": {op: doc_id}}]}
@@ -0,0 +1,209 @@
+"""Opt-in cProfile capture of single requests.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+`X-Admin-Token`, or when it is picked by `settings.profile_sample_rate`.
+The profiler is switched on only while the request's own coroutine is
+running, not while it awaits, so work other requests do on the event loop
+in the meantime is not attributed to it. Each result records a wall-clock
+breakdown (Mongo commands, Pydantic validation, other Python work, and the
+remainder spent waiting) plus the raw pstats data, and is kept in a bounded
+ring buffer for `/admin/profiles`.
+"""
+import cProfile
+import marshal
+import pstats
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Deque, Generator, List, Optional
+from uuid import uuid4
+
+from pymongo import monitoring
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_label
+from app.core.security import is_admin_token
+
+TOP_FUNCTIONS = 30
+
+
+class MongoTimer:
+    __slots__ = ("commands", "seconds")
+
+    def __init__(self) -> None:
+        self.commands = 0
+        self.seconds = 0.0
+
+
+# Set only while a request is being profiled; Motor copies it into driver threads.
+current_mongo_timer: ContextVar[Optional[MongoTimer]] = ContextVar("current_mongo_timer", default=None)
+
+
+class ProfileMongoListener(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._add(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._add(event)
+
+    def _add(self, event) -> None:
+        timer = current_mongo_timer.get()
+        if timer is not None:
+            timer.commands += 1
+            timer.seconds += event.duration_micros / 1e6
+
+
+profile_mongo_listener = ProfileMongoListener()
+
+_profiles: Deque[dict] = deque(maxlen=max(1, settings.profile_buffer_size))
+
+
+class ProfiledCoroutine:
+    """Awaits `coro` with `profiler` enabled only during its steps.
+
+    cProfile hooks the whole thread; toggling it around each `send`/`throw`
+    keeps the event loop's other tasks, which run while `coro` is suspended,
+    out of the profile.
+    """
+
+    def __init__(self, coro: Awaitable[Any], profiler: cProfile.Profile) -> None:
+        self._coro = coro.__await__()
+        self._profiler = profiler
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            self._profiler.enable()
+            try:
+                if error is not None:
+                    yielded = self._coro.throw(error)
+                else:
+                    yielded = self._coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._profiler.disable()
+            value, error = None, None
+            try:
+                value = yield yielded
+            except BaseException as exc:
+                error = exc
+
+
+def _is_pydantic(func: tuple) -> bool:
+    filename, _, name = func
+    return "pydantic" in filename or "pydantic_core" in name
+
+
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    return f"{filename}:{line}({name})" if line else name
+
+
+def summarize(stats: pstats.Stats) -> dict:
+    entries = stats.stats  # type: ignore[attr-defined]
+    python_seconds = sum(tottime for _, _, tottime, _, _ in entries.values())
+    pydantic_seconds = sum(
+        tottime for func, (_, _, tottime, _, _) in entries.items() if _is_pydantic(func)
+    )
+    top = sorted(entries.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+    return {
+        "pythonSeconds": python_seconds,
+        "pydanticSeconds": pydantic_seconds,
+        "topFunctions": [
+            {
+                "function": _function_label(func),
+                "calls": calls,
+                "tottimeMs": round(tottime * 1000, 3),
+                "cumtimeMs": round(cumtime * 1000, 3),
+            }
+            for func, (_, calls, tottime, cumtime, _) in top
+        ],
+    }
+
+
+def list_profiles() -> List[dict]:
+    return [
+        {key: value for key, value in profile.items() if key not in ("topFunctions", "pstats")}
+        for profile in reversed(_profiles)
+    ]
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    return next((p for p in _profiles if p["id"] == profile_id), None)
+
+
+def _requested_by_admin(scope: Scope) -> bool:
+    headers = Headers(scope=scope)
+    return headers.get("x-profile") == "1" and is_admin_token(headers.get("x-admin-token"))
+
+
+def _sampled() -> bool:
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = _requested_by_admin(scope)
+        if not requested and not _sampled():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        timer = MongoTimer()
+        token = current_mongo_timer.set(timer)
+        profiler = cProfile.Profile()
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            await ProfiledCoroutine(self.app(scope, receive, send_wrapper), profiler)
+        finally:
+            wall = time.perf_counter() - start
+            current_mongo_timer.reset(token)
+            stats = pstats.Stats(profiler)
+            summary = summarize(stats)
+            python_only = summary.pop("pythonSeconds") - summary["pydanticSeconds"]
+            pydantic = summary.pop("pydanticSeconds")
+            _profiles.append(
+                {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_label(scope),
+                    "status": status,
+                    "startedAt": started_at,
+                    "breakdown": {
+                        "wallMs": round(wall * 1000, 3),
+                        "mongoMs": round(timer.seconds * 1000, 3),
+                        "mongoCommands": timer.commands,
+                        "pydanticMs": round(pydantic * 1000, 3),
+                        "pythonMs": round(python_only * 1000, 3),
+                        "otherMs": round(max(0.0, wall - timer.seconds - pydantic - python_only) * 1000, 3),
+                    },
+                    **summary,
+                    "pstats": marshal.dumps(stats.stats),  # type: ignore[attr-defined]
+                }
+            )
@@ -1,6 +1,10 @@
+import asyncio
+import hmac
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
 
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -8,6 +12,10 @@ from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+_hash_executor: Optional[Executor] = None
+_hash_slots: Optional[asyncio.Semaphore] = None
+hash_pool_stats = {"completed": 0, "failed": 0, "rejected": 0, "inFlight": 0}
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -17,6 +25,67 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.password_hash_executor == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+            )
+    return _hash_executor
+
+
+async def _run_in_hash_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    global _hash_slots
+    if _hash_slots is None:
+        # One slot per worker: anything admitted starts at once, so the queue
+        # timeout bounds the whole wait and nothing queues inside the executor.
+        _hash_slots = asyncio.Semaphore(settings.password_hash_workers)
+    try:
+        await asyncio.wait_for(
+            _hash_slots.acquire(), timeout=settings.password_hash_queue_timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        hash_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+    hash_pool_stats["inFlight"] += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+    except BaseException:
+        hash_pool_stats["failed"] += 1
+        raise
+    finally:
+        hash_pool_stats["inFlight"] -= 1
+        _hash_slots.release()
+    hash_pool_stats["completed"] += 1
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(settings.admin_token and token and hmac.compare_digest(token, settings.admin_token))
+
+
 def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
     expire = datetime.utcnow() + timedelta(
         minutes=expires_minutes or settings.access_token_expire_minutes
@@ -0,0 +1,246 @@
+"""Slow MongoDB command log, aggregated by normalized query shape.
+
+`SlowQueryLog` is a pymongo command listener. Any command slower than
+`settings.slow_query_ms` is logged with its shape (literal values replaced by
+"?") and the route that issued it, and folded into a per-shape report. A
+sample of slow commands is re-run as `explain` with executionStats on the
+event loop, so the report shows documents examined versus returned.
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.metrics import current_route
+from app.indexes import plan_stages
+
+logger = logging.getLogger(__name__)
+
+# Stage options that name a collection or field rather than carry a value.
+NAME_FIELDS = {"from", "localField", "foreignField", "as", "path", "coll", "into"}
+SHAPE_FIELDS = ("filter", "query", "q", "pipeline", "sort", "key", "update", "u")
+EXPLAIN_INTERVAL_SECONDS = 60.0
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session, cluster-time and write-concern fields that explain rejects or doesn't need.
+COMMAND_METADATA = {
+    "lsid", "$db", "$clusterTime", "txnNumber", "autocommit", "startTransaction",
+    "writeConcern", "readConcern", "$readPreference", "ordered", "cursor",
+}
+
+
+def normalize(value: Any) -> Any:
+    """Keep field names and operators, replace literals with "?"."""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [normalize(item) for item in value]
+        return "?"
+    return "?"
+
+
+def pipeline_shape(pipeline: List[dict]) -> List[dict]:
+    """$match stages are normalized; other stages keep their field names and paths."""
+    shaped = []
+    for stage in pipeline:
+        name = next(iter(stage), None)
+        if name == "$match":
+            shaped.append(normalize(stage))
+        else:
+            shaped.append(_structure(stage))
+    return shaped
+
+
+def _structure(value: Any, key: Optional[str] = None) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: pipeline_shape(item) if k == "pipeline" else _structure(item, k)
+            for k, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_structure(item) for item in value]
+    if isinstance(value, str) and (value.startswith("$") or key in NAME_FIELDS):
+        return value
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Dict[str, Any]:
+    source = command
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or [{}]
+        source = statements[0]
+    shape: Dict[str, Any] = {"command": command_name, "collection": command.get(command_name)}
+    for field in SHAPE_FIELDS:
+        if field in source:
+            if field == "sort":
+                shape[field] = dict(source[field])
+            elif field == "pipeline":
+                shape[field] = pipeline_shape(source[field])
+            else:
+                shape[field] = normalize(source[field])
+    return shape
+
+
+def explain_command(command_name: str, command: dict) -> dict:
+    inner = {key: value for key, value in command.items() if key not in COMMAND_METADATA}
+    if command_name == "aggregate":
+        inner["cursor"] = {}
+    return {"explain": inner, "verbosity": "executionStats"}
+
+
+def summarize_explain(explained: dict) -> dict:
+    stats = explained.get("executionStats")
+    planner = explained.get("queryPlanner")
+    if stats is None:
+        for stage in explained.get("stages", []):
+            cursor = stage.get("$cursor")
+            if cursor:
+                stats, planner = cursor.get("executionStats"), cursor.get("queryPlanner")
+                break
+    stats = stats or {}
+    winning = (planner or {}).get("winningPlan", {})
+    return {
+        "nReturned": stats.get("nReturned"),
+        "totalDocsExamined": stats.get("totalDocsExamined"),
+        "totalKeysExamined": stats.get("totalKeysExamined"),
+        "executionTimeMillis": stats.get("executionTimeMillis"),
+        "stages": plan_stages(winning) if winning else [],
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[object, int], Tuple[dict, str, Optional[str]]] = {}
+        self._shapes: "OrderedDict[str, dict]" = OrderedDict()
+        self._explaining: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self.recorded = 0
+        self.explained = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop, client) -> None:
+        """Give the log an event loop and Motor client to run sampled explains on."""
+        self._loop = loop
+        self._client = client
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name == "explain" or settings.slow_query_ms <= 0:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.command,
+                event.database_name,
+                current_route(),
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < settings.slow_query_ms:
+            return
+        command, database, route = pending
+        shape = command_shape(event.command_name, command)
+        key = json.dumps(shape, sort_keys=True, default=str)
+        logger.warning(
+            "Slow MongoDB %s on %s took %.1f ms (route %s): %s",
+            event.command_name, shape.get("collection"), duration_ms, route or "-", key,
+        )
+        with self._lock:
+            self.recorded += 1
+            entry = self._shapes.pop(key, None)
+            if entry is None:
+                entry = {
+                    "shape": shape,
+                    "count": 0,
+                    "failures": 0,
+                    "totalMs": 0.0,
+                    "maxMs": 0.0,
+                    "routes": Counter(),
+                    "explain": None,
+                }
+            entry["count"] += 1
+            entry["failures"] += int(failed)
+            entry["totalMs"] += duration_ms
+            entry["maxMs"] = max(entry["maxMs"], duration_ms)
+            entry["lastSeen"] = time.time()
+            entry["routes"][route or "-"] += 1
+            self._shapes[key] = entry
+            while len(self._shapes) > settings.slow_query_max_shapes:
+                self._shapes.popitem(last=False)
+            last_explain = entry["explain"]
+            should_explain = (
+                event.command_name in EXPLAINABLE
+                and key not in self._explaining
+                and (last_explain is None or time.time() - last_explain["at"] > EXPLAIN_INTERVAL_SECONDS)
+                and random.random() < settings.slow_query_explain_sample_rate
+            )
+            if should_explain:
+                self._explaining.add(key)
+        if should_explain:
+            self._schedule_explain(key, database, event.command_name, command)
+
+    def _schedule_explain(self, key: str, database: str, command_name: str, command: dict) -> None:
+        if self._loop is None or self._client is None or self._loop.is_closed():
+            with self._lock:
+                self._explaining.discard(key)
+            return
+        coroutine = self._explain(key, database, explain_command(command_name, command))
+        asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _explain(self, key: str, database: str, command: dict) -> None:
+        try:
+            explained = await self._client[database].command(command)
+            summary = summarize_explain(explained)
+            summary["at"] = time.time()
+            with self._lock:
+                self.explained += 1
+                if key in self._shapes:
+                    self._shapes[key]["explain"] = summary
+        except Exception:
+            logger.exception("Explaining slow query failed")
+        finally:
+            with self._lock:
+                self._explaining.discard(key)
+
+    def report(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            entries = [
+                {
+                    **entry,
+                    "avgMs": round(entry["totalMs"] / entry["count"], 2),
+                    "totalMs": round(entry["totalMs"], 2),
+                    "maxMs": round(entry["maxMs"], 2),
+                    "routes": dict(entry["routes"].most_common()),
+                }
+                for entry in self._shapes.values()
+            ]
+        entries.sort(key=lambda entry: entry["totalMs"], reverse=True)
+        return entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"shapes": len(self._shapes), "recorded": self.recorded, "explained": self.explained}
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,210 @@
+"""Static file responses with long-lived caching, strong ETags and byte ranges.
+
+Files whose name (or parent directory) is a SHA-256 hash or UUID never change
+once written, so they are sent as `immutable` with an ETag derived from the
+name; everything else is revalidated by mtime and size.
+"""
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600, must-revalidate"
+CONTENT_NAME = re.compile(
+    r"^(?:[0-9a-f]{64}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$"
+)
+# Checked in order; a sibling `<file>.br` / `<file>.gz` is served when the client accepts it.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRangeResponse(Response):
+    """206 response carrying bytes `start`..`end` (inclusive) of a file."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: dict, media_type: str):
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.status_code = 206
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(
+            {
+                **headers,
+                "content-range": f"bytes {start}-{end}/{size}",
+                "content-length": str(self.length),
+            }
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": self.start,
+                        "count": self.length,
+                        "more_body": False,
+                    }
+                )
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                if not chunk:
+                    remaining = 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+
+def content_key(path: Path) -> Optional[str]:
+    stem = path.name.split(".")[0]
+    if CONTENT_NAME.match(stem):
+        return stem
+    if CONTENT_NAME.match(path.parent.name):
+        return f"{path.parent.name}-{stem}"
+    return None
+
+
+def _accepted_encodings(request_headers: Headers) -> set:
+    accepted = set()
+    for item in request_headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            weight = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            weight = 0.0
+        if coding.strip() and weight > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _precompressed(path: Path, request_headers: Headers) -> Tuple[Optional[str], Optional[Path], Optional[os.stat_result], bool]:
+    accepted = _accepted_encodings(request_headers)
+    has_variant = False
+    for encoding, suffix in PRECOMPRESSED:
+        candidate = path.with_name(path.name + suffix)
+        try:
+            candidate_stat = os.stat(candidate)
+        except OSError:
+            continue
+        if not stat.S_ISREG(candidate_stat.st_mode):
+            continue
+        has_variant = True
+        if encoding in accepted or "*" in accepted:
+            return encoding, candidate, candidate_stat, True
+    return None, None, None, has_variant
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) for a single satisfiable range, (-1, -1) if unsatisfiable, None to ignore."""
+    match = BYTE_RANGE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            return (-1, -1)
+        return (max(size - length, 0), size - 1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return (-1, -1)
+    return (start, end)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    opaque = etag.removeprefix("W/")
+    return "*" in tags or any(tag.removeprefix("W/") == opaque for tag in tags)
+
+
+def file_response(
+    full_path: "str | os.PathLike[str]",
+    stat_result: os.stat_result,
+    scope: Scope,
+    media_type: Optional[str] = None,
+) -> Response:
+    request_headers = Headers(scope=scope)
+    path = Path(full_path)
+    key = content_key(path)
+    if media_type is None:
+        media_type = guess_type(path.name)[0] or "text/plain"
+    if media_type.startswith("image/") and media_type != "image/svg+xml":
+        encoding, encoded_path, encoded_stat, has_variant = None, None, None, False
+    else:
+        encoding, encoded_path, encoded_stat, has_variant = _precompressed(path, request_headers)
+    serve_path, serve_stat = (encoded_path, encoded_stat) if encoded_path else (path, stat_result)
+
+    if key:
+        etag = f'"{key}-{encoding}"' if encoding else f'"{key}"'
+    else:
+        etag = f'"{serve_stat.st_mtime_ns:x}-{serve_stat.st_size:x}"'
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(serve_stat.st_mtime, usegmt=True),
+        "cache-control": IMMUTABLE if key else REVALIDATE,
+        "accept-ranges": "bytes",
+    }
+    if has_variant:
+        headers["vary"] = "Accept-Encoding"
+    if encoding:
+        headers["content-encoding"] = encoding
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return NotModifiedResponse(Headers(headers))
+    elif "if-modified-since" in request_headers:
+        since = parsedate(request_headers["if-modified-since"])
+        modified = parsedate(headers["last-modified"])
+        if since is not None and modified is not None and since >= modified:
+            return NotModifiedResponse(Headers(headers))
+
+    size = serve_stat.st_size
+    range_header = request_headers.get("range")
+    if range_header and scope["method"].upper() in ("GET", "HEAD"):
+        if_range = request_headers.get("if-range")
+        if if_range is None or if_range.strip() in (etag, headers["last-modified"]):
+            byte_range = _parse_range(range_header, size)
+            if byte_range == (-1, -1):
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                return FileRangeResponse(str(serve_path), start, end, size, headers, media_type)
+
+    return FileResponse(serve_path, headers=headers, media_type=media_type, stat_result=serve_stat)
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path: "str | os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return file_response(full_path, stat_result, scope)
@@ -1,6 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.core.config import settings
+from app.core.metrics import command_metrics
+from app.core.profiling import profile_mongo_listener
+from app.core.slow_queries import slow_query_log
 
 _client: AsyncIOMotorClient | None = None
 
@@ -8,7 +11,10 @@ _client: AsyncIOMotorClient | None = None
 def get_client() -> AsyncIOMotorClient:
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(settings.mongodb_uri)
+        _client = AsyncIOMotorClient(
+            settings.mongodb_uri,
+            event_listeners=[command_metrics, slow_query_log, profile_mongo_listener],
+        )
     return _client
 
 
@@ -0,0 +1,10 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.core.security import is_admin_token
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
@@ -2,27 +2,41 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decode_token
-from app.db import get_db
+from app.repositories import Repositories, get_repositories
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+user_cache = TTLCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_db)
-) -> dict:
+
+async def user_from_token(token: str, repos: Repositories) -> dict:
     user_id: Optional[str] = decode_token(token)
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
-    user = await db.users.find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-        )
-    return user
+    user = user_cache.get(user_id)
+    if user is None:
+        epoch = user_cache.epoch()
+        user = await repos.users.get(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+        user_cache.set(user_id, user, epoch)
+    return dict(user)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), repos: Repositories = Depends(get_repositories)
+) -> dict:
+    return await user_from_token(token, repos)
 
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "listings": [
+        IndexModel([("hostId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("zipCode", ASCENDING), ("rating", DESCENDING), ("_id", ASCENDING)]),
+        IndexModel([("rating", DESCENDING), ("_id", ASCENDING)]),
+        IndexModel([("size", ASCENDING), ("pricePerMonth", ASCENDING)]),
+    ],
+    "reservations": [
+        IndexModel(
+            [
+                ("listingId", ASCENDING),
+                ("status", ASCENDING),
+                ("startDate", ASCENDING),
+                ("endDate", ASCENDING),
+            ]
+        ),
+        IndexModel([("renterId", ASCENDING)]),
+        IndexModel(
+            [("holdExpiresAt", ASCENDING)],
+            partialFilterExpression={"status": "pending_host_confirmation"},
+        ),
+    ],
+    "capacity_ledger": [
+        IndexModel([("listingId", ASCENDING), ("day", ASCENDING)]),
+        IndexModel([("day", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "messages": [
+        IndexModel([("reservationId", ASCENDING), ("createdAt", ASCENDING), ("_id", ASCENDING)]),
+    ],
+}
+
+_SAMPLE_DATE = datetime(2024, 1, 1)
+
+QUERY_SHAPES: List[dict] = [
+    {"name": "users.by_email", "find": "users", "filter": {"email": "x@example.com"}},
+    {
+        "name": "listings.by_host",
+        "find": "listings",
+        "filter": {"hostId": "x"},
+        "sort": {"createdAt": -1, "_id": -1},
+    },
+    {"name": "listings.by_zip_prefix", "find": "listings", "filter": {"zipCode": {"$regex": "^941"}}},
+    {
+        "name": "listings.search_in_zip",
+        "find": "listings",
+        "filter": {"zipCode": "94110"},
+        "sort": {"rating": -1, "_id": 1},
+    },
+    {
+        "name": "listings.search_ranked",
+        "find": "listings",
+        "filter": {"rating": {"$lt": 4.5}},
+        "sort": {"rating": -1, "_id": 1},
+    },
+    {
+        "name": "listings.by_size_price",
+        "find": "listings",
+        "filter": {"size": "M", "pricePerMonth": {"$gte": 50, "$lte": 150}},
+    },
+    {
+        "name": "reservations.overlap",
+        "find": "reservations",
+        "filter": {
+            "listingId": "x",
+            "status": {"$in": ["confirmed", "pending_host_confirmation"]},
+            "startDate": {"$lt": _SAMPLE_DATE},
+            "endDate": {"$gt": _SAMPLE_DATE},
+        },
+    },
+    {"name": "reservations.by_renter", "find": "reservations", "filter": {"renterId": "x"}},
+    {
+        "name": "reservations.expired_holds",
+        "find": "reservations",
+        "filter": {"status": "pending_host_confirmation", "holdExpiresAt": {"$lte": _SAMPLE_DATE}},
+    },
+    {
+        "name": "messages.by_reservation",
+        "find": "messages",
+        "filter": {"reservationId": "x"},
+        "sort": {"createdAt": -1, "_id": -1},
+    },
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> bool:
+    """Create every index; errors are logged, not raised. True if all applied."""
+    applied = True
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except ConnectionFailure as exc:
+            logger.error("Could not reach MongoDB to create indexes: %s", exc)
+            return False
+        except PyMongoError as exc:
+            logger.error("Could not create indexes on %s: %s", collection, exc)
+            applied = False
+    return applied
+
+
+def plan_stages(plan: dict) -> List[str]:
+    stages: List[str] = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "queryPlan" in node:
+            stack.append(node["queryPlan"])
+        if "inputStage" in node:
+            stack.append(node["inputStage"])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+async def explain_query_shapes(db: AsyncIOMotorDatabase) -> List[dict]:
+    report = []
+    for shape in QUERY_SHAPES:
+        command = {"find": shape["find"], "filter": shape["filter"]}
+        if "sort" in shape:
+            command["sort"] = shape["sort"]
+        explained = await db.command("explain", command, verbosity="queryPlanner")
+        stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+        report.append(
+            {
+                "name": shape["name"],
+                "collection": shape["find"],
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+            }
+        )
+    return report
+
+
+async def _main(argv: List[str] | None = None) -> int:
+    from app.db import get_db
+
+    parser = argparse.ArgumentParser(description="Apply indexes and report query plans")
+    parser.add_argument("command", choices=["apply", "check"])
+    args = parser.parse_args(argv)
+
+    db = get_db()
+    if args.command == "apply":
+        if not await ensure_indexes(db):
+            print("Some indexes could not be applied; see the log.")
+            return 1
+        print("Indexes applied.")
+        return 0
+
+    report = await explain_query_shapes(db)
+    for row in report:
+        flag = "COLLSCAN" if row["collscan"] else "ok"
+        print(f"{flag:8} {row['name']:28} {' <- '.join(row['stages'])}")
+    return 1 if any(row["collscan"] for row in report) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
@@ -57,10 +57,10 @@ class ListingBase(BaseModel):
     zipCode: str
     images: List[str] = []
     availability: bool = True
-        availableFrom: Optional[date] = None
+    availableFrom: Optional[date] = None
     availableTo: Optional[date] = None
     bookingDeadline: Optional[date] = None
-    rating: Optional[float] = None  
+    rating: Optional[float] = None
 
 
 class ListingCreate(ListingBase):
@@ -81,6 +81,11 @@ class ListingPublic(ListingBase):
         populate_by_name = True
 
 
+class ListingPage(BaseModel):
+    items: List[ListingPublic]
+    nextCursor: Optional[str] = None
+
+
 class ListingUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -136,3 +141,9 @@ class MessagePublic(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+class MessagePage(BaseModel):
+    items: List[MessagePublic]
+    prevCursor: Optional[str] = None
+    nextCursor: Optional[str] = None
@@ -0,0 +1,28 @@
+from app.core.config import settings
+from app.repositories.base import Repositories
+
+_repositories: Repositories | None = None
+
+
+def _create_repositories() -> Repositories:
+    # Imported on first use so the memory backend never loads Motor.
+    if settings.storage_backend == "memory":
+        from app.repositories.memory import MemoryRepositories
+
+        return MemoryRepositories()
+    if settings.storage_backend == "mongo":
+        from app.db import get_db
+        from app.repositories.mongo import MongoRepositories
+
+        return MongoRepositories(get_db())
+    raise ValueError(f"Unknown STORAGE_BACKEND {settings.storage_backend!r}; use 'mongo' or 'memory'")
+
+
+def get_repositories() -> Repositories:
+    global _repositories
+    if _repositories is None:
+        _repositories = _create_repositories()
+    return _repositories
+
+
+__all__ = ["Repositories", "get_repositories"]
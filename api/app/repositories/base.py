@@ -0,0 +1,262 @@
+"""Storage interfaces the routers and services are written against.
+
+Each repository method is one query pattern the app actually uses, so a
+backend only has to make those fast. `MongoRepositories` issues the Motor
+queries; `MemoryRepositories` answers them from indexed in-process dicts for
+local load tests. Documents go in and come out in the same shape as the
+MongoDB collections (string `_id`, naive UTC datetimes).
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.schemas import ReservationStatus
+
+# Reservations that hold capacity, as stored (plain strings, like BSON).
+ACTIVE_STATUSES = [ReservationStatus.confirmed.value, ReservationStatus.pending.value]
+
+# Collections owned by the services rather than a single router.
+LEDGER = "capacity_ledger"
+STATS = "pricing_stats"
+
+# (sort key, _id) of the last row on the previous page.
+Keyset = Tuple[object, str]
+# (listingId, reservationId, days, sqft) for one reservation's ledger holds.
+Hold = Tuple[str, str, List[datetime], float]
+
+
+def ledger_key(listing_id: str, day: datetime) -> str:
+    """`_id` of the ledger document for one listing and day."""
+    return f"{listing_id}:{day.date().isoformat()}"
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user_id: str, fields: dict) -> None:
+        raise NotImplementedError
+
+
+class ListingRepository(ABC):
+    @abstractmethod
+    async def get(self, listing_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, listing_ids: List[str]) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def all(self) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, listing_id: str, fields: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, listing_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search(
+        self,
+        *,
+        zip_code: Optional[str],
+        size: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        now: datetime,
+        after: Optional[Keyset],
+        limit: int,
+    ) -> List[dict]:
+        """Listings in the exact zip code first, then the rest of the prefix;
+        within each, by rating (highest first, unrated last), then `_id`.
+
+        Each row carries `_sortKey` ([rank, rating], rank 0 for the exact
+        zip), `availableSqft` (for the window, or from `now` on without one)
+        and `hostVerified`; `after` is a row's (`_sortKey`, `_id`). With a
+        window, listings unavailable for it or already full are left out.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def by_host(self, host_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        """Newest first, keyset-paginated on (createdAt, _id)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def ids_by_host(self, host_id: str, limit: int) -> List[str]:
+        raise NotImplementedError
+
+
+class ReservationRepository(ABC):
+    @abstractmethod
+    async def get(self, reservation_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, reservation_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def transition(self, reservation_id: str, expected: List[str], status: str) -> Optional[dict]:
+        """Set `status` if the current one is in `expected`; the previous document, or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def overlapping(self, listing_id: str, start: datetime, end: datetime) -> List[dict]:
+        """Active reservations on a listing that overlap [start, end)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def for_user(self, user_id: str, listing_ids: List[str], limit: int) -> List[dict]:
+        """Reservations the user made, plus any on the given listings."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def active_ending_after(self, day: datetime) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def booked_sqft(
+        self, start: datetime, end: datetime, listing_ids: Optional[List[str]] = None
+    ) -> Dict[str, float]:
+        """Average sqft held per day over [start, end) by active reservations, per listing."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def expire_holds(self, now: datetime, limit: int) -> Tuple[int, List[dict]]:
+        """Expire up to `limit` lapsed pending holds.
+
+        Returns how many were due and the reservations this call expired
+        (a concurrent sweep or host action may have claimed some of them).
+        """
+        raise NotImplementedError
+
+
+class MessageRepository(ABC):
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def page(
+        self,
+        reservation_id: str,
+        limit: int,
+        after: Optional[Keyset] = None,
+        before: Optional[Keyset] = None,
+    ) -> List[dict]:
+        """Oldest first after `after`; otherwise newest first, before `before` if given."""
+        raise NotImplementedError
+
+
+class LedgerRepository(ABC):
+    @abstractmethod
+    async def hold(self, listing_id: str, reservation_id: str, days: List[datetime], capacity: float, sqft: float) -> int:
+        """Add `sqft` to each day that still has room; returns how many days were held."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release(self, holds: Iterable[Hold]) -> None:
+        """Give back each reservation's sqft on the days it holds; idempotent."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add(self, holds: List[Hold]) -> None:
+        """Record holds unconditionally, for rebuilding the ledger."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_for_listing(self, listing_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count(self) -> int:
+        raise NotImplementedError
+
+
+class PricingStatsRepository(ABC):
+    @abstractmethod
+    async def get_many(self, cell_ids: List[str]) -> List[dict]:
+        """Cell summaries, without the member map."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def replace(self, docs: List[dict]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_members(self, cell_id: str, updates: Dict[str, Optional[list]]) -> Tuple[Dict[str, list], int]:
+        """Set (or, for None, remove) listings' contributions to one cell in a
+        single atomic write that bumps the cell's `version`; returns the
+        member map and version afterwards."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_summaries(self, docs: List[dict]) -> None:
+        """Write each cell's summary fields, leaving its member map alone.
+
+        Each doc carries the `summaryVersion` it was computed from; a cell
+        that already has the same or a newer one is left as it is, so
+        concurrent refreshes cannot overwrite a summary with an older one.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_except(self, cell_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count(self, missing_members: bool = False) -> int:
+        """Number of cells, or of cells written before member maps existed."""
+        raise NotImplementedError
+
+
+class Repositories:
+    backend = ""
+
+    def __init__(
+        self,
+        users: UserRepository,
+        listings: ListingRepository,
+        reservations: ReservationRepository,
+        messages: MessageRepository,
+        ledger: LedgerRepository,
+        pricing_stats: PricingStatsRepository,
+    ) -> None:
+        self.users = users
+        self.listings = listings
+        self.reservations = reservations
+        self.messages = messages
+        self.ledger = ledger
+        self.pricing_stats = pricing_stats
+
+    async def prepare(self) -> None:
+        """Called once at startup (indexes, monitoring hooks)."""
@@ -0,0 +1,536 @@
+"""In-process backend for local load tests and route benchmarks.
+
+Documents live in dicts keyed by `_id` with secondary indexes for every
+lookup the repositories expose (email, host, zip, size, listing, renter,
+pending holds, per-reservation message order, per-listing ledger days).
+Methods never await between reading and writing, so each call is atomic on
+the event loop, which is what the conditional Mongo updates guarantee.
+Nothing is persisted; stored and returned documents are shallow copies.
+"""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models.schemas import ReservationStatus
+from app.repositories.base import (
+    ACTIVE_STATUSES,
+    LEDGER,
+    STATS,
+    Hold,
+    Keyset,
+    LedgerRepository,
+    ListingRepository,
+    MessageRepository,
+    PricingStatsRepository,
+    Repositories,
+    ReservationRepository,
+    UserRepository,
+    ledger_key,
+)
+from app.services.occupancy import OccupancyTimeline
+
+PENDING = ReservationStatus.pending
+
+
+def _copy(doc: Optional[dict]) -> Optional[dict]:
+    return dict(doc) if doc is not None else None
+
+
+def _plain(value: object) -> object:
+    # Enum members hash by name, so store their values, as BSON encoding would.
+    return value.value if isinstance(value, Enum) else value
+
+
+def _stored(doc: dict) -> dict:
+    return {key: _plain(value) for key, value in doc.items()}
+
+
+def _duplicate(field: str, value: object) -> DuplicateKeyError:
+    return DuplicateKeyError(f"E11000 duplicate key error dup key: {{ {field}: {value!r} }}", 11000)
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self) -> None:
+        self.docs: Dict[str, dict] = {}
+        self._by_email: Dict[str, str] = {}
+
+    def load(self, doc: dict) -> None:
+        if doc["_id"] in self.docs:
+            raise _duplicate("_id", doc["_id"])
+        if doc.get("email") in self._by_email:
+            raise _duplicate("email", doc["email"])
+        self.docs[doc["_id"]] = _stored(doc)
+        self._by_email[doc.get("email")] = doc["_id"]
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return _copy(self.docs.get(user_id))
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        user_id = self._by_email.get(email)
+        return _copy(self.docs.get(user_id)) if user_id else None
+
+    async def insert(self, doc: dict) -> None:
+        self.load(doc)
+
+    async def update(self, user_id: str, fields: dict) -> None:
+        doc = self.docs.get(user_id)
+        if doc is None:
+            return
+        if "email" in fields and fields["email"] != doc.get("email"):
+            if fields["email"] in self._by_email:
+                raise _duplicate("email", fields["email"])
+            del self._by_email[doc.get("email")]
+            self._by_email[fields["email"]] = user_id
+        doc.update(_stored(fields))
+
+
+class MemoryReservationRepository(ReservationRepository):
+    def __init__(self) -> None:
+        self.docs: Dict[str, dict] = {}
+        self._by_listing: Dict[str, Set[str]] = defaultdict(set)
+        self._by_renter: Dict[str, Set[str]] = defaultdict(set)
+        self._pending: Set[str] = set()
+
+    def load(self, doc: dict) -> None:
+        if doc["_id"] in self.docs:
+            raise _duplicate("_id", doc["_id"])
+        doc = _stored(doc)
+        self.docs[doc["_id"]] = doc
+        self._by_listing[doc["listingId"]].add(doc["_id"])
+        self._by_renter[doc.get("renterId")].add(doc["_id"])
+        if doc.get("status") == PENDING:
+            self._pending.add(doc["_id"])
+
+    def on_listing(self, listing_id: str) -> List[dict]:
+        return [self.docs[rid] for rid in self._by_listing.get(listing_id, ())]
+
+    def _set_status(self, doc: dict, status: str) -> None:
+        doc["status"] = _plain(status)
+        if status == PENDING:
+            self._pending.add(doc["_id"])
+        else:
+            self._pending.discard(doc["_id"])
+
+    async def get(self, reservation_id: str) -> Optional[dict]:
+        return _copy(self.docs.get(reservation_id))
+
+    async def insert(self, doc: dict) -> None:
+        self.load(doc)
+
+    async def delete(self, reservation_id: str) -> bool:
+        doc = self.docs.pop(reservation_id, None)
+        if doc is None:
+            return False
+        self._by_listing[doc["listingId"]].discard(reservation_id)
+        self._by_renter[doc.get("renterId")].discard(reservation_id)
+        self._pending.discard(reservation_id)
+        return True
+
+    async def transition(self, reservation_id: str, expected: List[str], status: str) -> Optional[dict]:
+        doc = self.docs.get(reservation_id)
+        if doc is None or doc.get("status") not in expected:
+            return None
+        previous = dict(doc)
+        self._set_status(doc, status)
+        return previous
+
+    async def overlapping(self, listing_id: str, start: datetime, end: datetime) -> List[dict]:
+        return [
+            {"startDate": r["startDate"], "endDate": r["endDate"], "sqftRequested": r.get("sqftRequested", 0)}
+            for r in self.on_listing(listing_id)
+            if r.get("status") in ACTIVE_STATUSES and r["startDate"] < end and r["endDate"] > start
+        ]
+
+    async def for_user(self, user_id: str, listing_ids: List[str], limit: int) -> List[dict]:
+        ids = set(self._by_renter.get(user_id, ()))
+        for listing_id in listing_ids:
+            ids |= self._by_listing.get(listing_id, set())
+        rows = sorted((self.docs[rid] for rid in ids), key=lambda r: (r.get("createdAt") or datetime.min, r["_id"]))
+        return [dict(r) for r in rows[:limit]]
+
+    async def active_ending_after(self, day: datetime) -> List[dict]:
+        return [
+            dict(r) for r in self.docs.values() if r.get("status") in ACTIVE_STATUSES and r["endDate"] > day
+        ]
+
+    async def booked_sqft(
+        self, start: datetime, end: datetime, listing_ids: Optional[List[str]] = None
+    ) -> Dict[str, float]:
+        if listing_ids is None:
+            rows: Iterable[dict] = self.docs.values()
+        else:
+            rows = (r for listing_id in listing_ids for r in self.on_listing(listing_id))
+        window = end - start
+        booked: Dict[str, float] = defaultdict(float)
+        for r in rows:
+            if r.get("status") in ACTIVE_STATUSES and r["startDate"] < end and r["endDate"] > start:
+                overlap = min(r["endDate"], end) - max(r["startDate"], start)
+                booked[r["listingId"]] += r.get("sqftRequested", 0) * (overlap / window)
+        return dict(booked)
+
+    async def expire_holds(self, now: datetime, limit: int) -> Tuple[int, List[dict]]:
+        due = [
+            self.docs[rid]
+            for rid in self._pending
+            if self.docs[rid].get("holdExpiresAt") is not None and self.docs[rid]["holdExpiresAt"] <= now
+        ][:limit]
+        sweep_id = str(uuid4())
+        for doc in due:
+            self._set_status(doc, ReservationStatus.expired)
+            doc["expiredBy"] = sweep_id
+        return len(due), [dict(doc) for doc in due]
+
+
+def _search_order(rank: int, rating: Optional[float], listing_id: str) -> Tuple[int, bool, float, str]:
+    """Sort tuple for (rank, rating desc with unrated last, _id), as Mongo orders it."""
+    return (rank, rating is None, -(rating or 0), listing_id)
+
+
+class MemoryListingRepository(ListingRepository):
+    def __init__(self, users: MemoryUserRepository, reservations: MemoryReservationRepository) -> None:
+        self.docs: Dict[str, dict] = {}
+        self._users = users
+        self._reservations = reservations
+        self._by_host: Dict[str, Set[str]] = defaultdict(set)
+        self._by_zip: Dict[str, Set[str]] = defaultdict(set)
+        self._by_size: Dict[str, Set[str]] = defaultdict(set)
+        self._zips: List[str] = []
+
+    def _index(self, doc: dict) -> None:
+        zip_code = doc.get("zipCode") or ""
+        if not self._by_zip[zip_code]:
+            insort(self._zips, zip_code)
+        self._by_zip[zip_code].add(doc["_id"])
+        self._by_host[doc.get("hostId")].add(doc["_id"])
+        self._by_size[doc.get("size")].add(doc["_id"])
+
+    def _unindex(self, doc: dict) -> None:
+        zip_code = doc.get("zipCode") or ""
+        self._by_zip[zip_code].discard(doc["_id"])
+        if not self._by_zip[zip_code]:
+            del self._by_zip[zip_code]
+            self._zips.pop(bisect_left(self._zips, zip_code))
+        self._by_host[doc.get("hostId")].discard(doc["_id"])
+        self._by_size[doc.get("size")].discard(doc["_id"])
+
+    def _zip_prefix(self, prefix: str) -> Set[str]:
+        ids: Set[str] = set()
+        for index in range(bisect_left(self._zips, prefix), len(self._zips)):
+            zip_code = self._zips[index]
+            if not zip_code.startswith(prefix):
+                break
+            ids |= self._by_zip[zip_code]
+        return ids
+
+    def load(self, doc: dict) -> None:
+        if doc["_id"] in self.docs:
+            raise _duplicate("_id", doc["_id"])
+        doc = _stored(doc)
+        self.docs[doc["_id"]] = doc
+        self._index(doc)
+
+    async def get(self, listing_id: str) -> Optional[dict]:
+        return _copy(self.docs.get(listing_id))
+
+    async def get_many(self, listing_ids: List[str]) -> List[dict]:
+        return [dict(self.docs[i]) for i in dict.fromkeys(listing_ids) if i in self.docs]
+
+    async def all(self) -> List[dict]:
+        return [dict(doc) for doc in self.docs.values()]
+
+    async def insert(self, doc: dict) -> None:
+        self.load(doc)
+
+    async def update(self, listing_id: str, fields: dict) -> None:
+        doc = self.docs.get(listing_id)
+        if doc is None:
+            return
+        self._unindex(doc)
+        doc.update(_stored(fields))
+        self._index(doc)
+
+    async def delete(self, listing_id: str) -> bool:
+        doc = self.docs.pop(listing_id, None)
+        if doc is None:
+            return False
+        self._unindex(doc)
+        return True
+
+    def _candidates(self, zip_code: Optional[str], size: Optional[str]) -> Iterable[str]:
+        if zip_code and size:
+            by_size = self._by_size.get(size, set())
+            return (i for i in self._zip_prefix(zip_code) if i in by_size)
+        if zip_code:
+            return self._zip_prefix(zip_code)
+        if size:
+            return self._by_size.get(size, set())
+        return self.docs.keys()
+
+    def _available_sqft(self, listing: dict, start: datetime, end: Optional[datetime]) -> float:
+        intervals = [
+            r
+            for r in self._reservations.on_listing(listing["_id"])
+            if r.get("status") in ACTIVE_STATUSES
+            and r["endDate"] > start
+            and (end is None or r["startDate"] < end)
+        ]
+        peak = OccupancyTimeline.from_reservations(intervals).peak(start, end or datetime.max)
+        capacity = listing.get("sizeSqft")
+        return max(0, (100 if capacity is None else capacity) - peak)
+
+    async def search(
+        self,
+        *,
+        zip_code: Optional[str],
+        size: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        now: datetime,
+        after: Optional[Keyset],
+        limit: int,
+    ) -> List[dict]:
+        size = _plain(size)
+        window = bool(start and end)
+        start_after = None
+        if after:
+            (rank, rating), listing_id = after
+            start_after = _search_order(rank, rating, listing_id)
+        ranked = []
+        for listing_id in self._candidates(zip_code, size):
+            doc = self.docs[listing_id]
+            price = doc.get("pricePerMonth")
+            if price_min is not None and (price is None or price < price_min):
+                continue
+            if price_max is not None and (price is None or price > price_max):
+                continue
+            if window:
+                if doc.get("availableFrom") is not None and doc["availableFrom"] > start:
+                    continue
+                if doc.get("availableTo") is not None and doc["availableTo"] < end:
+                    continue
+            rank = 0 if not zip_code or doc.get("zipCode") == zip_code else 1
+            key = _search_order(rank, doc.get("rating"), listing_id)
+            if start_after is None or key > start_after:
+                ranked.append(key)
+
+        if window:
+            # Availability is only known per listing, so walk the ranking until the page fills.
+            ranked.sort()
+            rows = []
+            for order in ranked:
+                available = self._available_sqft(self.docs[order[-1]], start, end)
+                if available > 0:
+                    rows.append((order, available))
+                    if len(rows) == limit:
+                        break
+        else:
+            rows = [
+                (order, self._available_sqft(self.docs[order[-1]], now, None))
+                for order in heapq.nsmallest(limit, ranked)
+            ]
+
+        results = []
+        for order, available in rows:
+            doc = dict(self.docs[order[-1]])
+            host = self._users.docs.get(doc.get("hostId")) or {}
+            doc.update(
+                availableSqft=available,
+                _sortKey=[order[0], doc.get("rating")],
+                hostVerified=host.get("verificationStatus") == "verified",
+            )
+            results.append(doc)
+        return results
+
+    async def by_host(self, host_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        keyed = [
+            ((doc["createdAt"], doc["_id"]), doc)
+            for doc in (self.docs[i] for i in self._by_host.get(host_id, ()))
+        ]
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        if after is not None:
+            keyed = [item for item in keyed if item[0] < after]
+        return [dict(doc) for _, doc in keyed[:limit]]
+
+    async def ids_by_host(self, host_id: str, limit: int) -> List[str]:
+        return list(self._by_host.get(host_id, ()))[:limit]
+
+
+class MemoryMessageRepository(MessageRepository):
+    def __init__(self) -> None:
+        self.docs: Dict[str, dict] = {}
+        # Per reservation, (createdAt, _id) in ascending order.
+        self._order: Dict[str, List[Tuple[datetime, str]]] = defaultdict(list)
+
+    def load(self, doc: dict) -> None:
+        if doc["_id"] in self.docs:
+            raise _duplicate("_id", doc["_id"])
+        self.docs[doc["_id"]] = _stored(doc)
+        order = self._order[doc["reservationId"]]
+        key = (doc["createdAt"], doc["_id"])
+        if not order or order[-1] < key:
+            order.append(key)
+        else:
+            insort(order, key)
+
+    async def insert(self, doc: dict) -> None:
+        self.load(doc)
+
+    async def page(
+        self,
+        reservation_id: str,
+        limit: int,
+        after: Optional[Keyset] = None,
+        before: Optional[Keyset] = None,
+    ) -> List[dict]:
+        order = self._order.get(reservation_id, [])
+        if after is not None:
+            start = bisect_right(order, tuple(after))
+            keys = order[start : start + limit]
+        else:
+            stop = bisect_left(order, tuple(before)) if before is not None else len(order)
+            keys = order[max(0, stop - limit) : stop][::-1]
+        return [dict(self.docs[message_id]) for _, message_id in keys]
+
+
+class MemoryLedgerRepository(LedgerRepository):
+    def __init__(self) -> None:
+        self.docs: Dict[str, dict] = {}
+        self._by_listing: Dict[str, Set[str]] = defaultdict(set)
+
+    def load(self, doc: dict) -> None:
+        self.docs[doc["_id"]] = {**doc, "holds": list(doc.get("holds", []))}
+        self._by_listing[doc["listingId"]].add(doc["_id"])
+
+    def _day(self, listing_id: str, day: datetime) -> dict:
+        key = ledger_key(listing_id, day)
+        doc = self.docs.get(key)
+        if doc is None:
+            doc = self.docs[key] = {"_id": key, "listingId": listing_id, "day": day, "reservedSqft": 0, "holds": []}
+            self._by_listing[listing_id].add(key)
+        return doc
+
+    async def hold(self, listing_id: str, reservation_id: str, days: List[datetime], capacity: float, sqft: float) -> int:
+        held = 0
+        for day in days:
+            doc = self._day(listing_id, day)
+            if doc["reservedSqft"] <= capacity - sqft and reservation_id not in doc["holds"]:
+                doc["reservedSqft"] += sqft
+                doc["holds"].append(reservation_id)
+                held += 1
+        return held
+
+    async def release(self, holds: Iterable[Hold]) -> None:
+        for listing_id, reservation_id, days, sqft in holds:
+            for day in days:
+                doc = self.docs.get(ledger_key(listing_id, day))
+                if doc is not None and reservation_id in doc["holds"]:
+                    doc["reservedSqft"] -= sqft
+                    doc["holds"].remove(reservation_id)
+
+    async def add(self, holds: List[Hold]) -> None:
+        for listing_id, reservation_id, days, sqft in holds:
+            for day in days:
+                doc = self._day(listing_id, day)
+                doc["reservedSqft"] += sqft
+                doc["holds"].append(reservation_id)
+
+    async def clear(self) -> None:
+        self.docs.clear()
+        self._by_listing.clear()
+
+    async def delete_for_listing(self, listing_id: str) -> None:
+        for key in self._by_listing.pop(listing_id, ()):
+            self.docs.pop(key, None)
+
+    async def count(self) -> int:
+        return len(self.docs)
+
+
+class MemoryPricingStatsRepository(PricingStatsRepository):
+    def __init__(self) -> None:
+        self.docs: Dict[str, dict] = {}
+
+    def load(self, doc: dict) -> None:
+        doc = dict(doc)
+        if "members" in doc:
+            doc["members"] = dict(doc["members"])
+        self.docs[doc["_id"]] = doc
+
+    async def get_many(self, cell_ids: List[str]) -> List[dict]:
+        return [
+            {k: v for k, v in self.docs[i].items() if k != "members"}
+            for i in dict.fromkeys(cell_ids)
+            if i in self.docs
+        ]
+
+    async def replace(self, docs: List[dict]) -> None:
+        for doc in docs:
+            self.load(doc)
+
+    async def update_members(self, cell_id: str, updates: Dict[str, Optional[list]]) -> Tuple[Dict[str, list], int]:
+        doc = self.docs.setdefault(cell_id, {"_id": cell_id})
+        doc["version"] = doc.get("version", 0) + 1
+        members = doc.setdefault("members", {})
+        for listing_id, member in updates.items():
+            if member is None:
+                members.pop(listing_id, None)
+            else:
+                members[listing_id] = list(member)
+        return dict(members), doc["version"]
+
+    async def set_summaries(self, docs: List[dict]) -> None:
+        for doc in docs:
+            cell = self.docs.get(doc["_id"])
+            if cell is not None and cell.get("summaryVersion", -1) < doc["summaryVersion"]:
+                cell.update(doc)
+
+    async def delete_except(self, cell_ids: List[str]) -> None:
+        keep = set(cell_ids)
+        for cell in [i for i in self.docs if i not in keep]:
+            del self.docs[cell]
+
+    async def count(self, missing_members: bool = False) -> int:
+        if missing_members:
+            return sum(1 for doc in self.docs.values() if "members" not in doc)
+        return len(self.docs)
+
+
+class MemoryRepositories(Repositories):
+    backend = "memory"
+
+    def __init__(self) -> None:
+        users = MemoryUserRepository()
+        reservations = MemoryReservationRepository()
+        super().__init__(
+            users=users,
+            listings=MemoryListingRepository(users, reservations),
+            reservations=reservations,
+            messages=MemoryMessageRepository(),
+            ledger=MemoryLedgerRepository(),
+            pricing_stats=MemoryPricingStatsRepository(),
+        )
+        self.collections = {
+            "users": users,
+            "listings": self.listings,
+            "reservations": reservations,
+            "messages": self.messages,
+            LEDGER: self.ledger,
+            STATS: self.pricing_stats,
+        }
+
+    def load(self, collection: str, docs: Iterable[dict]) -> int:
+        """Bulk-load documents shaped like the MongoDB collection of that name."""
+        repository = self.collections[collection]
+        count = 0
+        for doc in docs:
+            repository.load(doc)
+            count += 1
+        return count
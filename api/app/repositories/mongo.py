@@ -0,0 +1,496 @@
+"""Motor backend: the queries the routers and services used to issue inline."""
+import asyncio
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+
+from app.core.pagination import keyset_filter
+from app.core.slow_queries import slow_query_log
+from app.indexes import ensure_indexes
+from app.models.schemas import ReservationStatus
+from app.repositories.base import (
+    ACTIVE_STATUSES,
+    LEDGER,
+    STATS,
+    Hold,
+    Keyset,
+    LedgerRepository,
+    ListingRepository,
+    MessageRepository,
+    PricingStatsRepository,
+    Repositories,
+    ReservationRepository,
+    UserRepository,
+    ledger_key,
+)
+from app.services.occupancy import peak_expression
+
+_BATCH = 1000
+
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.users
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": user_id})
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return await self.collection.find_one({"email": email})
+
+    async def insert(self, doc: dict) -> None:
+        await self.collection.insert_one(doc)
+
+    async def update(self, user_id: str, fields: dict) -> None:
+        await self.collection.update_one({"_id": user_id}, {"$set": fields})
+
+
+def _occupancy_lookup(window: dict) -> dict:
+    return {
+        "$lookup": {
+            "from": "reservations",
+            "localField": "_id",
+            "foreignField": "listingId",
+            "pipeline": [
+                {"$match": {"status": {"$in": ACTIVE_STATUSES}, **window}},
+                {"$project": {"_id": 0, "startDate": 1, "endDate": 1, "sqftRequested": 1}},
+            ],
+            "as": "_occupancy",
+        }
+    }
+
+
+def _available_sqft(start: datetime, end: Optional[datetime] = None) -> dict:
+    peak = {"$ifNull": [peak_expression("$_occupancy", start, end), 0]}
+    return {"$max": [0, {"$subtract": [{"$ifNull": ["$sizeSqft", 100]}, peak]}]}
+
+
+def _after_rating(rating: Optional[float], listing_id: str) -> dict:
+    """Keyset filter for the (rating desc, unrated last, _id) order."""
+    if rating is None:
+        return {"rating": None, "_id": {"$gt": listing_id}}
+    return {
+        "$or": [
+            {"rating": {"$lt": rating}},
+            {"rating": rating, "_id": {"$gt": listing_id}},
+            {"rating": None},
+        ]
+    }
+
+
+def _after_key(rank: int, rating: Optional[float], listing_id: str) -> dict:
+    """Keyset filter for the (_rank, rating desc, unrated last, _id) order."""
+    return {"$or": [{"_rank": {"$gt": rank}}, {"$and": [{"_rank": rank}, _after_rating(rating, listing_id)]}]}
+
+
+def build_search_pipeline(
+    match: dict,
+    search_start: Optional[datetime],
+    search_end: Optional[datetime],
+    now: datetime,
+    limit: int,
+    zip_code: Optional[str] = None,
+    after: Optional[Keyset] = None,
+) -> List[dict]:
+    """A search in (_rank, rating desc, _id) order, where `_rank` is 0 for
+    the exact `zip_code` and 1 for the rest of its prefix.
+
+    The rank, keyset filter and sort come before any lookup, so the
+    pipeline stops after `limit` rows. Without a zip there is no rank and
+    the sort runs on the (rating, _id) index.
+    """
+    match = dict(match)
+    if search_start and search_end:
+        match.setdefault("$and", []).extend(
+            [
+                {"$or": [{"availableFrom": None}, {"availableFrom": {"$lte": search_start}}]},
+                {"$or": [{"availableTo": None}, {"availableTo": {"$gte": search_end}}]},
+            ]
+        )
+
+    if zip_code:
+        pipeline: List[dict] = [
+            {"$match": match},
+            {"$addFields": {"_rank": {"$cond": [{"$eq": ["$zipCode", zip_code]}, 0, 1]}}},
+        ]
+        if after:
+            (rank, rating), listing_id = after
+            pipeline.append({"$match": _after_key(rank, rating, listing_id)})
+        pipeline.append({"$sort": {"_rank": 1, "rating": -1, "_id": 1}})
+        sort_key = ["$_rank", "$rating"]
+    else:
+        if after:
+            (_, rating), listing_id = after
+            match.setdefault("$and", []).append(_after_rating(rating, listing_id))
+        pipeline = [{"$match": match}, {"$sort": {"rating": -1, "_id": 1}}]
+        sort_key = [0, "$rating"]
+
+    occupancy_window = bool(search_start and search_end)
+    if occupancy_window:
+        pipeline += [
+            _occupancy_lookup({"startDate": {"$lt": search_end}, "endDate": {"$gt": search_start}}),
+            {"$addFields": {"availableSqft": _available_sqft(search_start, search_end)}},
+            {"$match": {"availableSqft": {"$gt": 0}}},
+        ]
+    pipeline.append({"$limit": limit})
+
+    if not occupancy_window:
+        pipeline += [
+            _occupancy_lookup({"endDate": {"$gt": now}}),
+            {"$addFields": {"availableSqft": _available_sqft(now)}},
+        ]
+
+    pipeline += [
+        {
+            "$lookup": {
+                "from": "users",
+                "localField": "hostId",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"verificationStatus": 1}}],
+                "as": "_host",
+            }
+        },
+        {
+            "$addFields": {
+                "hostVerified": {"$eq": [{"$first": "$_host.verificationStatus"}, "verified"]},
+                "_sortKey": sort_key,
+            }
+        },
+        {"$project": {"_occupancy": 0, "_host": 0, "_rank": 0}},
+    ]
+    return pipeline
+
+
+class MongoListingRepository(ListingRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.listings
+
+    async def get(self, listing_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": listing_id})
+
+    async def get_many(self, listing_ids: List[str]) -> List[dict]:
+        return await self.collection.find({"_id": {"$in": listing_ids}}).to_list(length=None)
+
+    async def all(self) -> List[dict]:
+        return await self.collection.find({}).to_list(length=None)
+
+    async def insert(self, doc: dict) -> None:
+        await self.collection.insert_one(doc)
+
+    async def update(self, listing_id: str, fields: dict) -> None:
+        await self.collection.update_one({"_id": listing_id}, {"$set": fields})
+
+    async def delete(self, listing_id: str) -> bool:
+        result = await self.collection.delete_one({"_id": listing_id})
+        return result.deleted_count > 0
+
+    async def search(
+        self,
+        *,
+        zip_code: Optional[str],
+        size: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        now: datetime,
+        after: Optional[Keyset],
+        limit: int,
+    ) -> List[dict]:
+        filters: dict = {}
+        if size:
+            filters["size"] = size
+        if price_min is not None or price_max is not None:
+            price_filter: dict = {}
+            if price_min is not None:
+                price_filter["$gte"] = price_min
+            if price_max is not None:
+                price_filter["$lte"] = price_max
+            filters["pricePerMonth"] = price_filter
+
+        if zip_code:
+            filters["zipCode"] = {"$regex": f"^{re.escape(zip_code)}"}
+        pipeline = build_search_pipeline(filters, start, end, now, limit, zip_code, after)
+        return await self.collection.aggregate(pipeline).to_list(length=None)
+
+    async def by_host(self, host_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        filters: dict = {"hostId": host_id}
+        if after:
+            filters.update(keyset_filter("createdAt", *after, descending=True))
+        return await (
+            self.collection.find(filters)
+            .sort([("createdAt", -1), ("_id", -1)])
+            .limit(limit)
+            .to_list(length=limit)
+        )
+
+    async def ids_by_host(self, host_id: str, limit: int) -> List[str]:
+        rows = await self.collection.find({"hostId": host_id}, {"_id": 1}).to_list(length=limit)
+        return [row["_id"] for row in rows]
+
+
+class MongoReservationRepository(ReservationRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.reservations
+
+    async def get(self, reservation_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": reservation_id})
+
+    async def insert(self, doc: dict) -> None:
+        await self.collection.insert_one(doc)
+
+    async def delete(self, reservation_id: str) -> bool:
+        result = await self.collection.delete_one({"_id": reservation_id})
+        return result.deleted_count > 0
+
+    async def transition(self, reservation_id: str, expected: List[str], status: str) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"_id": reservation_id, "status": {"$in": expected}},
+            {"$set": {"status": status}},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    async def overlapping(self, listing_id: str, start: datetime, end: datetime) -> List[dict]:
+        return await self.collection.find(
+            {
+                "listingId": listing_id,
+                "status": {"$in": ACTIVE_STATUSES},
+                "startDate": {"$lt": end},
+                "endDate": {"$gt": start},
+            },
+            {"_id": 0, "startDate": 1, "endDate": 1, "sqftRequested": 1},
+        ).to_list(length=None)
+
+    async def for_user(self, user_id: str, listing_ids: List[str], limit: int) -> List[dict]:
+        filters: dict = {"renterId": user_id}
+        if listing_ids:
+            filters = {"$or": [filters, {"listingId": {"$in": listing_ids}}]}
+        return await self.collection.find(filters).to_list(length=limit)
+
+    async def active_ending_after(self, day: datetime) -> List[dict]:
+        return await self.collection.find(
+            {"status": {"$in": ACTIVE_STATUSES}, "endDate": {"$gt": day}},
+            {"listingId": 1, "startDate": 1, "endDate": 1, "sqftRequested": 1},
+        ).to_list(length=None)
+
+    async def booked_sqft(
+        self, start: datetime, end: datetime, listing_ids: Optional[List[str]] = None
+    ) -> Dict[str, float]:
+        match: dict = {
+            "status": {"$in": ACTIVE_STATUSES},
+            "startDate": {"$lt": end},
+            "endDate": {"$gt": start},
+        }
+        if listing_ids is not None:
+            match["listingId"] = {"$in": listing_ids}
+        overlap_ms = {"$subtract": [{"$min": ["$endDate", end]}, {"$max": ["$startDate", start]}]}
+        window_ms = (end - start).total_seconds() * 1000
+        rows = await self.collection.aggregate(
+            [
+                {"$match": match},
+                {
+                    "$group": {
+                        "_id": "$listingId",
+                        "sqft": {"$sum": {"$multiply": ["$sqftRequested", {"$divide": [overlap_ms, window_ms]}]}},
+                    }
+                },
+            ]
+        ).to_list(length=None)
+        return {r["_id"]: r["sqft"] for r in rows}
+
+    async def expire_holds(self, now: datetime, limit: int) -> Tuple[int, List[dict]]:
+        rows = await (
+            self.collection.find(
+                {"status": ReservationStatus.pending, "holdExpiresAt": {"$lte": now}},
+                {"_id": 1},
+            )
+            .limit(limit)
+            .to_list(length=limit)
+        )
+        if not rows:
+            return 0, []
+
+        ids = [r["_id"] for r in rows]
+        sweep_id = str(uuid4())
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, "status": ReservationStatus.pending},
+            {"$set": {"status": ReservationStatus.expired, "expiredBy": sweep_id}},
+        )
+        expired = await self.collection.find(
+            {"_id": {"$in": ids}, "expiredBy": sweep_id},
+            {"listingId": 1, "startDate": 1, "endDate": 1, "sqftRequested": 1},
+        ).to_list(length=None)
+        return len(rows), expired
+
+
+class MongoMessageRepository(MessageRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.messages
+
+    async def insert(self, doc: dict) -> None:
+        await self.collection.insert_one(doc)
+
+    async def page(
+        self,
+        reservation_id: str,
+        limit: int,
+        after: Optional[Keyset] = None,
+        before: Optional[Keyset] = None,
+    ) -> List[dict]:
+        filters: dict = {"reservationId": reservation_id}
+        if after:
+            filters.update(keyset_filter("createdAt", *after))
+            order = 1
+        else:
+            if before:
+                filters.update(keyset_filter("createdAt", *before, descending=True))
+            order = -1
+        return await (
+            self.collection.find(filters)
+            .sort([("createdAt", order), ("_id", order)])
+            .limit(limit)
+            .to_list(length=limit)
+        )
+
+
+class MongoLedgerRepository(LedgerRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db[LEDGER]
+
+    async def hold(self, listing_id: str, reservation_id: str, days: List[datetime], capacity: float, sqft: float) -> int:
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": ledger_key(listing_id, day)},
+                    {"$setOnInsert": {"listingId": listing_id, "day": day, "reservedSqft": 0, "holds": []}},
+                    upsert=True,
+                )
+                for day in days
+            ],
+            ordered=False,
+        )
+        result = await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": ledger_key(listing_id, day),
+                        "reservedSqft": {"$lte": capacity - sqft},
+                        "holds": {"$ne": reservation_id},
+                    },
+                    {"$inc": {"reservedSqft": sqft}, "$push": {"holds": reservation_id}},
+                )
+                for day in days
+            ],
+            ordered=False,
+        )
+        return result.modified_count
+
+    async def release(self, holds: Iterable[Hold]) -> None:
+        ops = [
+            UpdateMany(
+                {"_id": {"$in": [ledger_key(listing_id, day) for day in days]}, "holds": reservation_id},
+                {"$inc": {"reservedSqft": -sqft}, "$pull": {"holds": reservation_id}},
+            )
+            for listing_id, reservation_id, days, sqft in holds
+            if days
+        ]
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+
+    async def add(self, holds: List[Hold]) -> None:
+        ops = [
+            UpdateOne(
+                {"_id": ledger_key(listing_id, day)},
+                {
+                    "$inc": {"reservedSqft": sqft},
+                    "$push": {"holds": reservation_id},
+                    "$setOnInsert": {"listingId": listing_id, "day": day},
+                },
+                upsert=True,
+            )
+            for listing_id, reservation_id, days, sqft in holds
+            for day in days
+        ]
+        for start in range(0, len(ops), _BATCH):
+            await self.collection.bulk_write(ops[start : start + _BATCH], ordered=False)
+
+    async def clear(self) -> None:
+        await self.collection.delete_many({})
+
+    async def delete_for_listing(self, listing_id: str) -> None:
+        await self.collection.delete_many({"listingId": listing_id})
+
+    async def count(self) -> int:
+        return await self.collection.estimated_document_count()
+
+
+class MongoPricingStatsRepository(PricingStatsRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db[STATS]
+
+    async def get_many(self, cell_ids: List[str]) -> List[dict]:
+        cursor = self.collection.find({"_id": {"$in": cell_ids}}, {"members": 0})
+        return await cursor.to_list(length=len(cell_ids))
+
+    async def replace(self, docs: List[dict]) -> None:
+        ops = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs]
+        for start in range(0, len(ops), _BATCH):
+            await self.collection.bulk_write(ops[start : start + _BATCH], ordered=False)
+
+    async def update_members(self, cell_id: str, updates: Dict[str, Optional[list]]) -> Tuple[Dict[str, list], int]:
+        update: Dict[str, dict] = {"$inc": {"version": 1}}
+        for listing_id, member in updates.items():
+            if member is None:
+                update.setdefault("$unset", {})[f"members.{listing_id}"] = ""
+            else:
+                update.setdefault("$set", {})[f"members.{listing_id}"] = member
+        doc = await self.collection.find_one_and_update(
+            {"_id": cell_id},
+            update,
+            projection={"members": 1, "version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc.get("members") or {}, doc["version"]
+
+    async def set_summaries(self, docs: List[dict]) -> None:
+        ops = [
+            UpdateOne({"_id": doc["_id"], "summaryVersion": {"$not": {"$gte": doc["summaryVersion"]}}}, {"$set": doc})
+            for doc in docs
+        ]
+        for start in range(0, len(ops), _BATCH):
+            await self.collection.bulk_write(ops[start : start + _BATCH], ordered=False)
+
+    async def delete_except(self, cell_ids: List[str]) -> None:
+        await self.collection.delete_many({"_id": {"$nin": cell_ids}})
+
+    async def count(self, missing_members: bool = False) -> int:
+        if missing_members:
+            return await self.collection.count_documents({"members": {"$exists": False}})
+        return await self.collection.estimated_document_count()
+
+
+class MongoRepositories(Repositories):
+    backend = "mongo"
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(
+            users=MongoUserRepository(db),
+            listings=MongoListingRepository(db),
+            reservations=MongoReservationRepository(db),
+            messages=MongoMessageRepository(db),
+            ledger=MongoLedgerRepository(db),
+            pricing_stats=MongoPricingStatsRepository(db),
+        )
+        self.db = db
+        self._index_task: Optional[asyncio.Task] = None
+
+    async def prepare(self) -> None:
+        slow_query_log.bind(asyncio.get_running_loop(), self.db.client)
+        # In the background so an unreachable database delays nothing; the app
+        # still starts and serves /health while MongoDB is down.
+        self._index_task = asyncio.create_task(ensure_indexes(self.db))
@@ -1,4 +1,4 @@
-from app.routers import auth, listings, reservations, messages, pricing, matching
+from app.routers import admin, auth, listings, reservations, messages, pricing, matching
 
-__all__ = ["auth", "listings", "reservations", "messages", "pricing", "matching"]
+__all__ = ["admin", "auth", "listings", "reservations", "messages", "pricing", "matching"]
 
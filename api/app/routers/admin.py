@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.security import hash_pool_stats
+from app.core.slow_queries import slow_query_log
+from app.db import get_db
+from app.deps.admin import require_admin
+from app.deps.auth import user_cache
+from app.indexes import ensure_indexes, explain_query_shapes
+from app.repositories import Repositories, get_repositories
+from app.services import capacity, pricing_stats
+from app.services.catalog import catalog
+from app.services.derivatives import derivative_stats
+from app.services.hold_expiry import sweeper
+from app.services.message_hub import broker
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def require_mongo() -> None:
+    if settings.storage_backend != "mongo":
+        raise HTTPException(status_code=404, detail="Indexes only apply to the mongo storage backend")
+
+
+@router.get("/indexes", dependencies=[Depends(require_mongo)])
+async def index_report(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return await explain_query_shapes(db)
+
+
+@router.post("/indexes", dependencies=[Depends(require_mongo)])
+async def apply_indexes(db: AsyncIOMotorDatabase = Depends(get_db)):
+    await ensure_indexes(db)
+    return await explain_query_shapes(db)
+
+
+@router.get("/stats")
+async def stats():
+    return {
+        "storage": {"backend": settings.storage_backend},
+        "holdSweeper": sweeper.metrics,
+        "userCache": user_cache.stats(),
+        "passwordHashPool": hash_pool_stats,
+        "messageBroker": broker.stats(),
+        "catalog": {"listings": len(catalog)},
+        "pricingCache": pricing_stats.suggestion_cache.stats(),
+        "imageDerivatives": derivative_stats,
+        "slowQueries": slow_query_log.stats(),
+    }
+
+
+@router.get("/slow-queries")
+async def slow_queries(limit: int = Query(50, ge=1, le=500)):
+    return {"thresholdMs": settings.slow_query_ms, "shapes": slow_query_log.report(limit)}
+
+
+@router.delete("/slow-queries", status_code=204)
+async def clear_slow_queries():
+    slow_query_log.clear()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    return {"sampleRate": settings.profile_sample_rate, "profiles": profiling.list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {key: value for key, value in profile.items() if key != "pstats"}
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: str):
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=profile["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+    )
+
+
+@router.post("/holds/sweep")
+async def sweep_holds():
+    return {"swept": await sweeper.sweep_once(), "holdSweeper": sweeper.metrics}
+
+
+@router.post("/capacity/rebuild")
+async def rebuild_capacity_ledger(repos: Repositories = Depends(get_repositories)):
+    return {"reservations": await capacity.rebuild(repos)}
+
+
+@router.post("/pricing/rebuild")
+async def rebuild_pricing_stats(repos: Repositories = Depends(get_repositories)):
+    return {"cells": await pricing_stats.rebuild(repos)}
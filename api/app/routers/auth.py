@@ -3,19 +3,18 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.core.security import create_access_token, get_password_hash, verify_password
-from app.db import get_db
-from app.deps.auth import get_current_user
+from app.core.security import create_access_token, get_password_hash_async, verify_password_async
+from app.deps.auth import get_current_user, user_cache
 from app.models.schemas import TokenResponse, UserCreate, UserPublic
+from app.repositories import Repositories, get_repositories
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserPublic, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
-    existing = await db.users.find_one({"email": user.email})
+async def register(user: UserCreate, repos: Repositories = Depends(get_repositories)):
+    existing = await repos.users.get_by_email(user.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -25,7 +24,7 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db))
         "_id": user_id,
         "name": user.name,
         "email": user.email,
-        "hashed_password": get_password_hash(user.password),
+        "hashed_password": await get_password_hash_async(user.password),
         "zipCode": user.zipCode,
         "isHost": user.isHost,
         "phone": user.phone,
@@ -33,17 +32,18 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db))
         "backgroundCheckAccepted": user.backgroundCheckAccepted,
         "verificationStatus": "verified-mock" if user.backgroundCheckAccepted else "pending",
     }
-    await db.users.insert_one(doc)
+    await repos.users.insert(doc)
+    user_cache.invalidate(user_id)
     return UserPublic(**doc)
 
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
 ):
-    user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await repos.users.get_by_email(form_data.username)
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     token = create_access_token(subject=user["_id"])
     return TokenResponse(access_token=token)
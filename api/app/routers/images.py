@@ -0,0 +1,22 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.static import file_response
+from app.services import derivatives
+
+router = APIRouter()
+
+
+@router.get("/{image_id}/{width}")
+async def get_image_variant(image_id: str, width: int, request: Request):
+    if width not in derivatives.WIDTHS:
+        allowed = ", ".join(str(w) for w in derivatives.WIDTHS)
+        raise HTTPException(status_code=404, detail=f"Width must be one of {allowed}")
+    try:
+        path = await derivatives.ensure_derivative(image_id, width)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Image could not be resized")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return file_response(path, os.stat(path), request.scope, media_type="image/webp")
@@ -1,15 +1,16 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
 from uuid import uuid4
-from pathlib import Path
-import shutil
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, UploadFile, File
 
+from app.core.pagination import decode_cursor, encode_cursor
 from app.deps.auth import get_current_user
-from app.models.schemas import ListingCreate, ListingPublic, ListingUpdate, StorageSize
-from app.db import get_db
+from app.models.schemas import ListingCreate, ListingPage, ListingPublic, ListingUpdate, StorageSize
+from app.repositories import Repositories, get_repositories
+from app.repositories.base import Keyset
+from app.services import derivatives, pricing_stats, uploads
+from app.services.catalog import catalog
 
 router = APIRouter()
 
@@ -17,7 +18,8 @@ router = APIRouter()
 @router.post("/", response_model=ListingPublic, status_code=status.HTTP_201_CREATED)
 async def create_listing(
     payload: ListingCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
     if not current_user.get("isHost"):
@@ -53,10 +55,28 @@ async def create_listing(
         "rating": payload_dict.get("rating") or 4.7,
         "createdAt": now,
     }
-    await db.listings.insert_one(doc)
+    await repos.listings.insert(doc)
+    catalog.upsert(doc)
+    background_tasks.add_task(pricing_stats.refresh_cells, repos, [doc])
     return ListingPublic(**doc)
 
 
+SEARCH_LIMIT = 100
+MY_LISTINGS_LIMIT = 200
+
+
+def _search_cursor(cursor: str) -> Keyset:
+    key, listing_id = decode_cursor(cursor)
+    if not (
+        isinstance(key, list)
+        and len(key) == 2
+        and key[0] in (0, 1)
+        and (key[1] is None or isinstance(key[1], (int, float)))
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key, listing_id
+
+
 @router.get("/")
 async def list_listings(
     zipCode: Optional[str] = None,
@@ -65,128 +85,64 @@ async def list_listings(
     priceMin: Optional[float] = Query(default=None, ge=0),
     priceMax: Optional[float] = Query(default=None, ge=0),
     size: Optional[StorageSize] = None,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=SEARCH_LIMIT),
+    repos: Repositories = Depends(get_repositories),
 ):
-    filters: dict = {}
-    if zipCode:
-        filters["zipCode"] = {"$regex": f"^{zipCode}", "$options": "i"}
-    if size:
-        filters["size"] = size
-    if priceMin is not None or priceMax is not None:
-        price_filter: dict = {}
-        if priceMin is not None:
-            price_filter["$gte"] = priceMin
-        if priceMax is not None:
-            price_filter["$lte"] = priceMax
-        filters["pricePerMonth"] = price_filter
-
-    cursor = db.listings.find(filters)
-    listings = await cursor.to_list(length=100)
-
+    search_start = search_end = None
     if startDate and endDate:
-        from datetime import datetime as dt
-        search_start = dt.fromisoformat(startDate)
-        search_end = dt.fromisoformat(endDate)
-        
-        def is_within_availability(listing):
-            available_from = listing.get("availableFrom")
-            available_to = listing.get("availableTo")
-            
-            if not available_from and not available_to:
-                return True
-            
-            if available_from:
-                if hasattr(available_from, 'date'):
-                    pass
-                else:
-                    available_from = dt.combine(available_from, dt.min.time())
-            
-            if available_to:
-                if hasattr(available_to, 'date'):
-                    pass
-                else:
-                    available_to = dt.combine(available_to, dt.min.time())
-            
-            if available_from and search_start < available_from:
-                return False
-            if available_to and search_end > available_to:
-                return False
-            
-            return True
-        
-        listings = [l for l in listings if is_within_availability(l)]
-        
-        overlapping_reservations = await db.reservations.find({
-            "status": {"$in": ["confirmed", "pending_host_confirmation"]},
-            "$and": [
-                {"startDate": {"$lt": search_end}},
-                {"endDate": {"$gt": search_start}}
-            ]
-        }).to_list(length=500)
-        
-        reserved_listing_ids = set(r["listingId"] for r in overlapping_reservations)
-        
-        listings = [l for l in listings if l["_id"] not in reserved_listing_ids]
-
-    host_ids = list(set(l.get("hostId") for l in listings if l.get("hostId")))
-    hosts = {}
-    if host_ids:
-        host_cursor = db.users.find({"_id": {"$in": host_ids}})
-        host_list = await host_cursor.to_list(length=100)
-        hosts = {h["_id"]: h for h in host_list}
-
-    listing_ids = [l["_id"] for l in listings]
-    from datetime import datetime as dt
-    now = dt.utcnow()
-    
-    active_reservations = await db.reservations.find({
-        "listingId": {"$in": listing_ids},
-        "status": {"$in": ["confirmed", "pending_host_confirmation"]},
-        "endDate": {"$gt": now}
-    }).to_list(length=1000)
-    
-    reserved_by_listing = {}
-    for r in active_reservations:
-        lid = r["listingId"]
-        if lid not in reserved_by_listing:
-            reserved_by_listing[lid] = 0
-        reserved_by_listing[lid] += r.get("sqftRequested", 0)
-
+        try:
+            search_start = datetime.fromisoformat(startDate)
+            search_end = datetime.fromisoformat(endDate)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid startDate or endDate")
+
+    listings = await repos.listings.search(
+        zip_code=zipCode,
+        size=size,
+        price_min=priceMin,
+        price_max=priceMax,
+        start=search_start,
+        end=search_end,
+        now=datetime.utcnow(),
+        after=_search_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+
+    next_cursor = None
+    if len(listings) > limit:
+        listings = listings[:limit]
+        last = listings[-1]
+        next_cursor = encode_cursor(last["_sortKey"], last["_id"])
     for listing in listings:
-        host = hosts.get(listing.get("hostId"), {})
-        listing["hostVerified"] = host.get("verificationStatus") == "verified"
-        
-        total_sqft = listing.get("sizeSqft", 100)
-        reserved_sqft = reserved_by_listing.get(listing["_id"], 0)
-        listing["availableSqft"] = max(0, total_sqft - reserved_sqft)
-
-    if zipCode:
-        listings.sort(
-            key=lambda l: (
-                0 if l.get("zipCode") == zipCode else 1,
-                -(l.get("rating") or 0),
-            )
-        )
-    return listings
+        listing.pop("_sortKey", None)
+    return {"items": listings, "nextCursor": next_cursor}
 
 
-@router.get("/mine", response_model=List[ListingPublic])
+@router.get("/mine", response_model=ListingPage)
 async def my_listings(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=MY_LISTINGS_LIMIT),
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
     if not current_user.get("isHost"):
         raise HTTPException(status_code=403, detail="Only hosts can view their listings")
-    cursor = db.listings.find({"hostId": current_user["_id"]})
-    items = await cursor.to_list(length=200)
-    return [ListingPublic(**l) for l in items]
+    after = decode_cursor(cursor) if cursor else None
+    items = await repos.listings.by_host(current_user["_id"], after, limit + 1)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["createdAt"], items[-1]["_id"])
+    return ListingPage(items=[ListingPublic(**l) for l in items], nextCursor=next_cursor)
 
 
 @router.get("/{listing_id}", response_model=ListingPublic)
 async def get_listing(
-    listing_id: str, db: AsyncIOMotorDatabase = Depends(get_db)
+    listing_id: str, repos: Repositories = Depends(get_repositories)
 ):
-    listing = await db.listings.find_one({"_id": listing_id})
+    listing = await repos.listings.get(listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     return ListingPublic(**listing)
@@ -196,10 +152,11 @@ async def get_listing(
 async def update_listing(
     listing_id: str,
     payload: ListingUpdate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    listing = await db.listings.find_one({"_id": listing_id})
+    listing = await repos.listings.get(listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     if listing.get("hostId") != current_user["_id"]:
@@ -218,41 +175,42 @@ async def update_listing(
     if not updates:
         return ListingPublic(**listing)
 
-    await db.listings.update_one({"_id": listing_id}, {"$set": updates})
+    await repos.listings.update(listing_id, updates)
+    previous = dict(listing)
     listing.update(updates)
+    catalog.upsert(listing)
+    background_tasks.add_task(pricing_stats.refresh_cells, repos, [previous, listing])
     return ListingPublic(**listing)
 
 
 @router.delete("/{listing_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_listing(
     listing_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    listing = await db.listings.find_one({"_id": listing_id})
+    listing = await repos.listings.get(listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     if listing.get("hostId") != current_user["_id"]:
         raise HTTPException(status_code=403, detail="Not authorized")
-    await db.listings.delete_one({"_id": listing_id})
+    await repos.listings.delete(listing_id)
+    catalog.remove(listing_id)
+    background_tasks.add_task(pricing_stats.refresh_cells, repos, [listing])
+    await repos.ledger.delete_for_listing(listing_id)
     return None
 
 
 @router.post("/upload")
 async def upload_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user),
 ):
     if file.content_type not in ("image/jpeg", "image/png"):
         raise HTTPException(status_code=400, detail="Only JPEG and PNG images are allowed")
 
-    upload_dir = Path(__file__).resolve().parent.parent / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    ext = ".jpg" if file.content_type == "image/jpeg" else ".png"
-    filename = f"{uuid4()}{ext}"
-    dest = upload_dir / filename
-
-    with dest.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
+    filename = await uploads.store_image(file)
+    background_tasks.add_task(derivatives.generate_all, filename)
     return {"url": f"/uploads/{filename}"}
@@ -1,15 +1,19 @@
 from typing import List
 
 from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from app.db import get_db
 from app.models.schemas import ListingPublic
-from app.services.matching import match_listings
+from app.repositories import Repositories, get_repositories
+from app.services.catalog import catalog
+from app.services.vector_matching import match_snapshot
 
 router = APIRouter()
 
+MAX_BATCH_QUERIES = 100
+RECOMMENDATION_COUNT = 5
+
 
 class MatchRequest(BaseModel):
     query: str
@@ -21,8 +25,42 @@ class MatchResponse(BaseModel):
     explanation: str
 
 
-@router.post("/recommend", response_model=MatchResponse)
-async def recommend(payload: MatchRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
-    rows = await db.listings.find({}).to_list(length=500)
-    top, explanation = match_listings(rows, payload.query, payload.zipCode)
+class BatchMatchRequest(BaseModel):
+    queries: List[MatchRequest] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class BatchMatchResponse(BaseModel):
+    results: List[MatchResponse]
+
+
+def _recommend(payload: MatchRequest) -> MatchResponse:
+    top, explanation = match_snapshot(
+        catalog.snapshot,
+        payload.query,
+        payload.zipCode,
+        k=RECOMMENDATION_COUNT,
+        relevance=catalog.relevance(payload.query),
+    )
     return MatchResponse(listings=[ListingPublic(**l) for l in top], explanation=explanation)
+
+
+@router.post("/recommend", response_model=MatchResponse)
+async def recommend(payload: MatchRequest, repos: Repositories = Depends(get_repositories)):
+    await catalog.ensure_loaded(repos.listings)
+    return _recommend(payload)
+
+
+@router.post("/recommend/batch", response_model=BatchMatchResponse)
+async def recommend_batch(payload: BatchMatchRequest, repos: Repositories = Depends(get_repositories)):
+    await catalog.ensure_loaded(repos.listings)
+    return await run_in_threadpool(_recommend_batch, payload.queries)
+
+
+def _recommend_batch(queries: List[MatchRequest]) -> BatchMatchResponse:
+    # Runs in a worker thread so a large batch doesn't hold the event loop;
+    # the catalog lock is taken per query so writes can interleave.
+    results = []
+    for query in queries:
+        with catalog.lock:
+            results.append(_recommend(query))
+    return BatchMatchResponse(results=results)
@@ -1,23 +1,28 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 
-from app.deps.auth import get_current_user
-from app.db import get_db
-from app.models.schemas import MessageCreate, MessagePublic
+from app.core.pagination import decode_cursor, encode_cursor
+from app.deps.auth import get_current_user, user_from_token
+from app.models.schemas import MessageCreate, MessagePage, MessagePublic
+from app.repositories import Repositories, get_repositories
+from app.services.message_hub import broker
 
 router = APIRouter()
 
+MESSAGE_PAGE_LIMIT = 200
+WS_AUTH_TIMEOUT_SECONDS = 10
 
-async def _assert_participant(db: AsyncIOMotorDatabase, reservation_id: str, user_id: str, is_host: bool) -> dict:
-    reservation = await db.reservations.find_one({"_id": reservation_id})
+
+async def _assert_participant(repos: Repositories, reservation_id: str, user_id: str, is_host: bool) -> dict:
+    reservation = await repos.reservations.get(reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    listing = await db.listings.find_one({"_id": reservation["listingId"]})
+    listing = await repos.listings.get(reservation["listingId"])
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
@@ -30,11 +35,11 @@ async def _assert_participant(db: AsyncIOMotorDatabase, reservation_id: str, use
 @router.post("/", response_model=MessagePublic, status_code=status.HTTP_201_CREATED)
 async def send_message(
     payload: MessageCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
     await _assert_participant(
-        db, payload.reservationId, current_user["_id"], current_user.get("isHost", False)
+        repos, payload.reservationId, current_user["_id"], current_user.get("isHost", False)
     )
 
     message_id = str(uuid4())
@@ -46,19 +51,105 @@ async def send_message(
         "content": payload.content,
         "createdAt": now,
     }
-    await db.messages.insert_one(doc)
+    await repos.messages.insert(doc)
+    await broker.publish(payload.reservationId, doc)
     return MessagePublic(**doc)
 
 
-@router.get("/{reservation_id}", response_model=List[MessagePublic])
+@router.get("/{reservation_id}", response_model=MessagePage)
 async def list_messages(
     reservation_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    since: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=MESSAGE_PAGE_LIMIT),
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
+    if since and before:
+        raise HTTPException(status_code=400, detail="Use either since or before, not both")
     await _assert_participant(
-        db, reservation_id, current_user["_id"], current_user.get("isHost", False)
+        repos, reservation_id, current_user["_id"], current_user.get("isHost", False)
+    )
+
+    if since:
+        messages = await repos.messages.page(reservation_id, limit, after=decode_cursor(since))
+        prev_cursor = None
+    else:
+        older_than = decode_cursor(before) if before else None
+        messages = await repos.messages.page(reservation_id, limit + 1, before=older_than)
+        has_older = len(messages) > limit
+        messages = messages[:limit][::-1]
+        prev_cursor = (
+            encode_cursor(messages[0]["createdAt"], messages[0]["_id"]) if has_older else None
+        )
+
+    if messages:
+        next_cursor = encode_cursor(messages[-1]["createdAt"], messages[-1]["_id"])
+    else:
+        next_cursor = since
+    return MessagePage(
+        items=[MessagePublic(**m) for m in messages],
+        prevCursor=prev_cursor,
+        nextCursor=next_cursor,
     )
-    messages = await db.messages.find({"reservationId": reservation_id}).sort("createdAt").to_list(length=500)
-    return [MessagePublic(**m) for m in messages]
+
+
+async def _forward(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    while True:
+        doc = await queue.get()
+        await websocket.send_json(MessagePublic(**doc).model_dump(mode="json", by_alias=True))
+
+
+async def _drain(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+async def _authenticate(websocket: WebSocket, reservation_id: str, repos: Repositories) -> bool:
+    """Read the `{"type": "auth", "token": ...}` frame the client sends first.
+
+    The token travels in a message rather than the URL so it stays out of
+    access logs and proxies.
+    """
+    try:
+        frame = await asyncio.wait_for(websocket.receive_json(), WS_AUTH_TIMEOUT_SECONDS)
+        if not isinstance(frame, dict) or frame.get("type") != "auth" or not isinstance(frame.get("token"), str):
+            raise HTTPException(status_code=401, detail="Expected an auth frame")
+        user = await user_from_token(frame["token"], repos)
+        await _assert_participant(repos, reservation_id, user["_id"], user.get("isHost", False))
+    except WebSocketDisconnect:
+        return False
+    except (HTTPException, asyncio.TimeoutError, KeyError, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return True
+
+
+@router.websocket("/{reservation_id}/ws")
+async def message_stream(
+    websocket: WebSocket,
+    reservation_id: str,
+    repos: Repositories = Depends(get_repositories),
+):
+    await websocket.accept()
+    if not await _authenticate(websocket, reservation_id, repos):
+        return
+
+    # The client starts its REST catch-up on `ready`, which is only sent once
+    # subscribed, so nothing published in between is missed.
+    async with broker.subscribe(reservation_id) as queue:
+        await websocket.send_json({"type": "ready"})
+        tasks = [
+            asyncio.create_task(_forward(websocket, queue)),
+            asyncio.create_task(_drain(websocket)),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -1,12 +1,15 @@
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 
-from app.services.pricing import suggest_price
+from app.repositories import Repositories, get_repositories
+from app.services import pricing_stats
 
 router = APIRouter()
 
+MAX_BATCH_ITEMS = 5000
+
 
 class PriceSuggestionRequest(BaseModel):
     size: Literal["S", "M", "L"] = Field(..., description="Size bucket")
@@ -23,15 +26,16 @@ class PriceSuggestionResponse(BaseModel):
     explanation: str
 
 
-@router.post("/suggest", response_model=PriceSuggestionResponse)
-async def pricing_suggest(payload: PriceSuggestionRequest):
-    if payload.size is None:
-        raise HTTPException(status_code=400, detail="size is required")
-    suggested, min_price, max_price, explanation = suggest_price(
-        size=payload.size,
-        zip_code=payload.zipCode,
-        indoor=payload.indoor,
-    )
+class BatchPriceSuggestionRequest(BaseModel):
+    items: List[PriceSuggestionRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class BatchPriceSuggestionResponse(BaseModel):
+    results: List[PriceSuggestionResponse]
+
+
+def _to_response(suggestion: tuple) -> PriceSuggestionResponse:
+    suggested, min_price, max_price, explanation = suggestion
     return PriceSuggestionResponse(
         suggestedPrice=suggested,
         minPrice=min_price,
@@ -39,3 +43,22 @@ async def pricing_suggest(payload: PriceSuggestionRequest):
         explanation=explanation,
     )
 
+
+@router.post("/suggest", response_model=PriceSuggestionResponse)
+async def pricing_suggest(
+    payload: PriceSuggestionRequest, repos: Repositories = Depends(get_repositories)
+):
+    if payload.size is None:
+        raise HTTPException(status_code=400, detail="size is required")
+    [suggestion] = await pricing_stats.suggest_many(repos, [(payload.size, payload.zipCode, payload.indoor)])
+    return _to_response(suggestion)
+
+
+@router.post("/suggest/batch", response_model=BatchPriceSuggestionResponse)
+async def pricing_suggest_batch(
+    payload: BatchPriceSuggestionRequest, repos: Repositories = Depends(get_repositories)
+):
+    suggestions = await pricing_stats.suggest_many(
+        repos, [(item.size, item.zipCode, item.indoor) for item in payload.items]
+    )
+    return BatchPriceSuggestionResponse(results=[_to_response(s) for s in suggestions])
@@ -2,13 +2,15 @@ from datetime import datetime, timedelta, date
 from typing import List
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 
 from app.core.config import settings
 from app.deps.auth import get_current_user
 from app.models.schemas import ReservationCreate, ReservationPublic, ReservationStatus
-from app.db import get_db
+from app.repositories import Repositories, get_repositories
+from app.repositories.base import ACTIVE_STATUSES
+from app.services import capacity, pricing_stats
+from app.services.occupancy import OccupancyTimeline
 
 router = APIRouter()
 
@@ -37,10 +39,11 @@ def _calculate_costs(
 @router.post("/", response_model=ReservationPublic, status_code=status.HTTP_201_CREATED)
 async def create_reservation(
     payload: ReservationCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    listing = await db.listings.find_one({"_id": payload.listingId})
+    listing = await repos.listings.get(payload.listingId)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
@@ -73,16 +76,9 @@ async def create_reservation(
     if sqft_requested > total_sqft:
         raise HTTPException(status_code=400, detail=f"Cannot request more than {total_sqft} sqft available")
     
-    overlapping_reservations = await db.reservations.find({
-        "listingId": payload.listingId,
-        "status": {"$in": ["confirmed", "pending_host_confirmation"]},
-        "$and": [
-            {"startDate": {"$lt": end_dt}},
-            {"endDate": {"$gt": start_dt}}
-        ]
-    }).to_list(length=500)
-    
-    reserved_sqft = sum(r.get("sqftRequested", 0) for r in overlapping_reservations)
+    overlapping_reservations = await repos.reservations.overlapping(payload.listingId, start_dt, end_dt)
+
+    reserved_sqft = OccupancyTimeline.from_reservations(overlapping_reservations).peak(start_dt, end_dt)
     available_sqft = total_sqft - reserved_sqft
     
     if sqft_requested > available_sqft:
@@ -96,6 +92,15 @@ async def create_reservation(
     )
 
     reservation_id = str(uuid4())
+    reserved = await capacity.reserve(
+        repos, payload.listingId, reservation_id, total_sqft, start_dt, end_dt, sqft_requested
+    )
+    if not reserved:
+        raise HTTPException(
+            status_code=409,
+            detail="Another booking just took this space for some of these dates. Please try again.",
+        )
+
     now = datetime.utcnow()
     doc = {
         "_id": reservation_id,
@@ -113,28 +118,47 @@ async def create_reservation(
         "createdAt": now,
         "paymentStatus": "mocked-success",
     }
-    await db.reservations.insert_one(doc)
+    try:
+        await repos.reservations.insert(doc)
+    except Exception:
+        await capacity.release_for(repos, doc)
+        raise
+    background_tasks.add_task(pricing_stats.refresh_cells, repos, [listing])
     return ReservationPublic(**doc)
 
 
 @router.post("/{reservation_id}/approve", response_model=ReservationPublic)
 async def approve_reservation(
     reservation_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    reservation = await db.reservations.find_one({"_id": reservation_id})
+    reservation = await repos.reservations.get(reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    listing = await db.listings.find_one({"_id": reservation["listingId"]})
+    listing = await repos.listings.get(reservation["listingId"])
     if not listing or listing.get("hostId") != current_user["_id"]:
         raise HTTPException(status_code=403, detail="Not authorized for this listing")
 
-    await db.reservations.update_one(
-        {"_id": reservation_id},
-        {"$set": {"status": ReservationStatus.confirmed}},
+    if reservation["status"] == ReservationStatus.confirmed:
+        return ReservationPublic(**reservation)
+
+    was_active = reservation["status"] == ReservationStatus.pending
+    if not was_active:
+        if not await capacity.reserve_for(repos, reservation, listing.get("sizeSqft", 100)):
+            raise HTTPException(status_code=409, detail="Not enough space left for these dates")
+
+    previous = await repos.reservations.transition(
+        reservation_id, [reservation["status"]], ReservationStatus.confirmed
     )
+    if previous is None:
+        if not was_active:
+            await capacity.release_for(repos, reservation)
+        raise HTTPException(status_code=409, detail="Reservation changed, please retry")
+    if not was_active:
+        background_tasks.add_task(pricing_stats.refresh_cells, repos, [listing])
     reservation["status"] = ReservationStatus.confirmed
     return ReservationPublic(**reservation)
 
@@ -142,60 +166,61 @@ async def approve_reservation(
 @router.post("/{reservation_id}/decline", response_model=ReservationPublic)
 async def decline_reservation(
     reservation_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    reservation = await db.reservations.find_one({"_id": reservation_id})
+    reservation = await repos.reservations.get(reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    listing = await db.listings.find_one({"_id": reservation["listingId"]})
+    listing = await repos.listings.get(reservation["listingId"])
     if not listing or listing.get("hostId") != current_user["_id"]:
         raise HTTPException(status_code=403, detail="Not authorized for this listing")
 
-    await db.reservations.update_one(
-        {"_id": reservation_id},
-        {"$set": {"status": ReservationStatus.declined}},
+    previous = await repos.reservations.transition(
+        reservation_id, ACTIVE_STATUSES, ReservationStatus.declined
     )
+    if previous:
+        await capacity.release_for(repos, previous)
+        background_tasks.add_task(pricing_stats.refresh_cells, repos, [listing])
     reservation["status"] = ReservationStatus.declined
     return ReservationPublic(**reservation)
 
 
 @router.get("/", response_model=List[ReservationPublic])
 async def list_my_reservations(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    filters = {"renterId": current_user["_id"]}
-
+    host_listing_ids = []
     if current_user.get("isHost"):
-        host_listings = await db.listings.find({"hostId": current_user["_id"]}).to_list(
-            length=200
-        )
-        host_listing_ids = [l["_id"] for l in host_listings]
-        filters = {"$or": [{"renterId": current_user["_id"]}, {"listingId": {"$in": host_listing_ids}}]}
+        host_listing_ids = await repos.listings.ids_by_host(current_user["_id"], 200)
 
-    cursor = db.reservations.find(filters)
-    reservations = await cursor.to_list(length=200)
+    reservations = await repos.reservations.for_user(current_user["_id"], host_listing_ids, 200)
     return [ReservationPublic(**r) for r in reservations]
 
 
 @router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reservation(
     reservation_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    repos: Repositories = Depends(get_repositories),
     current_user: dict = Depends(get_current_user),
 ):
-    reservation = await db.reservations.find_one({"_id": reservation_id})
+    reservation = await repos.reservations.get(reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    listing = await db.listings.find_one({"_id": reservation["listingId"]})
+    listing = await repos.listings.get(reservation["listingId"])
     is_host_owner = listing and listing.get("hostId") == current_user["_id"]
     is_renter = reservation.get("renterId") == current_user["_id"]
 
     if not (is_host_owner or is_renter):
         raise HTTPException(status_code=403, detail="Not authorized for this reservation")
 
-    await db.reservations.delete_one({"_id": reservation_id})
+    if await repos.reservations.delete(reservation_id):
+        await capacity.release_for(repos, reservation)
+        if listing:
+            background_tasks.add_task(pricing_stats.refresh_cells, repos, [listing])
     return None
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from motor.motor_asyncio import AsyncIOMotorDatabase
 import stripe
 
 from app.core.config import settings
-from app.db import get_db
-from app.deps.auth import get_current_user
+from app.deps.auth import get_current_user, user_cache
+from app.repositories import Repositories, get_repositories
 
 router = APIRouter()
 
@@ -14,16 +13,14 @@ stripe.api_key = settings.stripe_secret_key
 @router.post("/create-session")
 async def create_verification_session(
     current_user: dict = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
 ):
     if current_user.get("verificationStatus") == "verified":
         raise HTTPException(status_code=400, detail="Already verified")
     
     if not current_user.get("isHost"):
-        await db.users.update_one(
-            {"_id": current_user["_id"]},
-            {"$set": {"isHost": True}}
-        )
+        await repos.users.update(current_user["_id"], {"isHost": True})
+        user_cache.invalidate(current_user["_id"])
 
     try:
         verification_session = stripe.identity.VerificationSession.create(
@@ -42,15 +39,14 @@ async def create_verification_session(
             return_url=f"{settings.frontend_url}/profile?verified=pending",
         )
 
-        await db.users.update_one(
-            {"_id": current_user["_id"]},
+        await repos.users.update(
+            current_user["_id"],
             {
-                "$set": {
-                    "stripeVerificationSessionId": verification_session.id,
-                    "verificationStatus": "pending",
-                }
+                "stripeVerificationSessionId": verification_session.id,
+                "verificationStatus": "pending",
             },
         )
+        user_cache.invalidate(current_user["_id"])
 
         return {
             "url": verification_session.url,
@@ -64,7 +60,7 @@ async def create_verification_session(
 @router.get("/status")
 async def get_verification_status(
     current_user: dict = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
 ):
     session_id = current_user.get("stripeVerificationSessionId")
     
@@ -86,10 +82,8 @@ async def get_verification_status(
         new_status = status_map.get(session.status, "pending")
 
         if new_status != current_user.get("verificationStatus"):
-            await db.users.update_one(
-                {"_id": current_user["_id"]},
-                {"$set": {"verificationStatus": new_status}},
-            )
+            await repos.users.update(current_user["_id"], {"verificationStatus": new_status})
+            user_cache.invalidate(current_user["_id"])
 
         return {
             "status": new_status,
@@ -108,7 +102,7 @@ async def get_verification_status(
 @router.post("/webhook")
 async def stripe_webhook(
     request: Request,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
 ):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
@@ -125,19 +119,15 @@ async def stripe_webhook(
         user_id = session.metadata.get("user_id")
         
         if user_id:
-            await db.users.update_one(
-                {"_id": user_id},
-                {"$set": {"verificationStatus": "verified"}},
-            )
+            await repos.users.update(user_id, {"verificationStatus": "verified"})
+            user_cache.invalidate(user_id)
 
     elif event.type == "identity.verification_session.requires_input":
         session = event.data.object
         user_id = session.metadata.get("user_id")
         
         if user_id:
-            await db.users.update_one(
-                {"_id": user_id},
-                {"$set": {"verificationStatus": "requires_input"}},
-            )
+            await repos.users.update(user_id, {"verificationStatus": "requires_input"})
+            user_cache.invalidate(user_id)
 
     return {"received": True}
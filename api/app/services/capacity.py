@@ -0,0 +1,133 @@
+"""Per-listing, per-day capacity ledger.
+
+Each ledger document holds the sqft reserved on one listing for one day and
+the ids of the reservations holding it. Reserving is a conditional increment
+per day that only applies while the day has room, so concurrent requests cannot
+push a day past the listing's capacity. The `holds` list makes rollback and
+release idempotent.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+from app.repositories.base import Repositories
+
+_BATCH = 1000
+
+
+def _days(start: datetime, end: datetime) -> List[datetime]:
+    day = datetime.combine(start.date(), datetime.min.time())
+    days = []
+    while day < end:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+async def reserve(
+    repos: Repositories,
+    listing_id: str,
+    reservation_id: str,
+    capacity: float,
+    start: datetime,
+    end: datetime,
+    sqft: float,
+) -> bool:
+    days = _days(start, end)
+    if not days:
+        return True
+
+    held = await repos.ledger.hold(listing_id, reservation_id, days, capacity, sqft)
+    if held < len(days):
+        await release(repos, listing_id, reservation_id, start, end, sqft)
+        return False
+    return True
+
+
+async def release(
+    repos: Repositories,
+    listing_id: str,
+    reservation_id: str,
+    start: datetime,
+    end: datetime,
+    sqft: float,
+) -> None:
+    await repos.ledger.release([(listing_id, reservation_id, _days(start, end), sqft)])
+
+
+async def release_many(repos: Repositories, reservations: List[dict]) -> None:
+    await repos.ledger.release(
+        (
+            reservation["listingId"],
+            reservation["_id"],
+            _days(reservation["startDate"], reservation["endDate"]),
+            reservation.get("sqftRequested", 0),
+        )
+        for reservation in reservations
+    )
+
+
+async def reserve_for(repos: Repositories, reservation: dict, capacity: float) -> bool:
+    return await reserve(
+        repos,
+        reservation["listingId"],
+        reservation["_id"],
+        capacity,
+        reservation["startDate"],
+        reservation["endDate"],
+        reservation.get("sqftRequested", 0),
+    )
+
+
+async def release_for(repos: Repositories, reservation: dict) -> None:
+    await release(
+        repos,
+        reservation["listingId"],
+        reservation["_id"],
+        reservation["startDate"],
+        reservation["endDate"],
+        reservation.get("sqftRequested", 0),
+    )
+
+
+async def rebuild(repos: Repositories) -> int:
+    """Recreate the ledger from active reservations that have not ended yet."""
+    await repos.ledger.clear()
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    reservations = await repos.reservations.active_ending_after(today)
+    for start in range(0, len(reservations), _BATCH):
+        await repos.ledger.add(
+            [
+                (
+                    reservation["listingId"],
+                    reservation["_id"],
+                    _days(max(reservation["startDate"], today), reservation["endDate"]),
+                    reservation.get("sqftRequested", 0),
+                )
+                for reservation in reservations[start : start + _BATCH]
+            ]
+        )
+    return len(reservations)
+
+
+async def rebuild_if_needed(repos: Repositories) -> None:
+    """Fill an empty ledger on startup, e.g. after upgrading a database whose
+    reservations predate it; otherwise its days would look free to `reserve`."""
+    if await repos.ledger.count() == 0:
+        await rebuild(repos)
+
+
+async def _main(argv: List[str] | None = None) -> int:
+    from app.repositories import get_repositories
+
+    parser = argparse.ArgumentParser(description="Maintain the capacity ledger")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    count = await rebuild(get_repositories())
+    print(f"Ledger rebuilt from {count} active reservations.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.repositories.base import ListingRepository
+from app.services.matching import listing_text
+from app.services.relevance import BM25Index
+from app.services.vector_matching import ListingSnapshot
+
+
+class CatalogIndex:
+    """In-memory copy of the listing catalog for recommendations.
+
+    Holds the columnar snapshot every query is scored against and the BM25
+    index over titles and descriptions. Every live row is scored: the price
+    term alone can lift a cheap listing outside the requested size, zip and
+    keywords into the top k, so pruning rows would not match the exact
+    scorer, and one vectorized pass over the snapshot is cheap. Writes in
+    this process update both directly; everything is reloaded once it is
+    older than `max_age_seconds` to pick up writes made by other workers.
+
+    Writes happen on the event loop; `lock` is held by them and by readers
+    running in worker threads, so a thread never sees a half-applied write.
+    """
+
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        self.snapshot = ListingSnapshot()
+        self.text_index = BM25Index()
+        self._rows: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.max_age_seconds
+        )
+
+    async def ensure_loaded(self, listings: ListingRepository) -> None:
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            self.load(await listings.all())
+
+    def load(self, rows: Iterable[dict]) -> None:
+        rows = list(rows)
+        with self.lock:
+            self._load(rows)
+
+    def _load(self, rows: List[dict]) -> None:
+        self.snapshot = ListingSnapshot()
+        self.text_index = BM25Index()
+        self._rows.clear()
+        for row in rows:
+            self._upsert(row)
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, listing: dict) -> None:
+        with self.lock:
+            self._upsert(listing)
+
+    def _upsert(self, listing: dict) -> None:
+        listing_id = listing["_id"]
+        row = self._rows.get(listing_id)
+        if row is None:
+            row = self.snapshot.append(listing)
+            self._rows[listing_id] = row
+        else:
+            self.snapshot.update(row, listing)
+        self.text_index.upsert(row, listing_text(listing))
+
+    def remove(self, listing_id: str) -> None:
+        with self.lock:
+            row = self._rows.pop(listing_id, None)
+            if row is None:
+                return
+            self.snapshot.delete(row)
+            self.text_index.remove(row)
+
+    def relevance(self, query: str) -> np.ndarray:
+        return self.text_index.scores(query, len(self.snapshot))
+
+
+catalog = CatalogIndex(max_age_seconds=settings.catalog_max_age_seconds)
@@ -0,0 +1,134 @@
+"""Resized WebP variants of listing images.
+
+Variants live at `<derived_dir>/<image id>/<width>.webp`, where the image
+id is the upload's content hash (or the stem of a bundled file under
+`image_dir`). `derived_dir` is not mounted, so variants are only served
+through `/images/{id}/{width}`, which checks the width and freshness. They
+are rendered in a process pool, either right after an upload or the first
+time a missing variant is requested.
+"""
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services.uploads import upload_dir
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 640, 1024)
+SOURCE_EXTENSIONS = (".jpg", ".png", ".webp")
+IMAGE_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[Tuple[str, int], "asyncio.Future[Path]"] = {}
+derivative_stats = {"rendered": 0, "cached": 0, "failed": 0}
+
+
+def render(source: str, dest: str, width: int) -> None:
+    """Runs in a worker process: downscale `source` to `width` and save as WebP."""
+    with Image.open(source) as image:
+        image.draft("RGB", (width, width))
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        tmp = f"{dest}.{os.getpid()}.part"
+        try:
+            image.save(tmp, "WEBP", quality=80, method=4)
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.image_workers)
+    return _executor
+
+
+def shutdown_derivative_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def find_source(image_id: str) -> Optional[Path]:
+    if not IMAGE_ID.match(image_id):
+        return None
+    for directory in (upload_dir(), Path(settings.image_dir)):
+        for ext in SOURCE_EXTENSIONS:
+            path = directory / f"{image_id}{ext}"
+            if path.is_file():
+                return path
+    return None
+
+
+def derived_path(image_id: str, width: int) -> Path:
+    return Path(settings.derived_dir) / image_id / f"{width}.webp"
+
+
+def _is_fresh(dest: Path, source: Path) -> bool:
+    try:
+        return dest.stat().st_mtime >= source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+async def _render(image_id: str, source: Path, width: int) -> Path:
+    dest = derived_path(image_id, width)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_get_executor(), render, str(source), str(dest), width)
+    except Exception:
+        derivative_stats["failed"] += 1
+        raise
+    derivative_stats["rendered"] += 1
+    return dest
+
+
+async def ensure_derivative(image_id: str, width: int) -> Optional[Path]:
+    """Path of the `width` variant of `image_id`, rendering it if needed; None if unknown."""
+    if width not in WIDTHS:
+        return None
+    source = find_source(image_id)
+    if source is None:
+        return None
+    dest = derived_path(image_id, width)
+    if _is_fresh(dest, source):
+        derivative_stats["cached"] += 1
+        return dest
+
+    key = (image_id, width)
+    pending = _pending.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_render(image_id, source, width))
+        _pending[key] = pending
+        pending.add_done_callback(lambda _: _pending.pop(key, None))
+    return await asyncio.shield(pending)
+
+
+async def generate_all(filename: str) -> None:
+    """Pre-render every width for a freshly stored upload."""
+    image_id = Path(filename).stem
+    results = await asyncio.gather(
+        *(ensure_derivative(image_id, width) for width in WIDTHS), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Rendering variants of %s failed: %s", filename, result)
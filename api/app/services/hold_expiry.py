@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.repositories import get_repositories
+from app.services import capacity, pricing_stats
+
+logger = logging.getLogger(__name__)
+
+
+class HoldExpirySweeper:
+    """Expires pending reservations whose hold has lapsed and frees their capacity."""
+
+    def __init__(self, interval_seconds: float, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.metrics = {
+            "runs": 0,
+            "batches": 0,
+            "expired": 0,
+            "errors": 0,
+            "lastRunAt": None,
+            "lastRunMs": 0.0,
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sweep_batch(self, now: datetime) -> int:
+        repos = get_repositories()
+        due, expired = await repos.reservations.expire_holds(now, self.batch_size)
+        if not due:
+            return 0
+
+        await capacity.release_many(repos, expired)
+        await pricing_stats.refresh_for_listing_ids(repos, (r["listingId"] for r in expired))
+
+        self.metrics["batches"] += 1
+        self.metrics["expired"] += len(expired)
+        return due
+
+    async def sweep_once(self) -> int:
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        total = 0
+        while True:
+            swept = await self._sweep_batch(now)
+            total += swept
+            if swept < self.batch_size:
+                break
+        self.metrics["runs"] += 1
+        self.metrics["lastRunAt"] = now
+        self.metrics["lastRunMs"] = round((time.perf_counter() - started) * 1000, 2)
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.metrics["errors"] += 1
+                logger.exception("Hold expiry sweep failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+sweeper = HoldExpirySweeper(
+    interval_seconds=settings.hold_sweep_interval_seconds,
+    batch_size=settings.hold_sweep_batch_size,
+)
@@ -1,8 +1,15 @@
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Sequence, Set, Tuple
+import heapq
 import re
 
 SizeBuckets = {"S": (0, 60), "M": (60, 150), "L": (150, 1_000)}
 
+ADJACENT_SIZES: Dict[str, Set[str]] = {"S": {"M"}, "M": {"S", "L"}, "L": {"M"}}
+
+# Weight of the normalized (0..1) text relevance score; a perfect text match
+# counts as much as an exact size match.
+RELEVANCE_WEIGHT = 2.0
+
 KEYWORD_SIZE_HINTS: Dict[str, float] = {
     "small": 40,
     "medium": 80,
@@ -39,24 +46,52 @@ def _bucket_from_sqft(sqft: float) -> str:
     return "L"
 
 
+def parse_query(query: str) -> Tuple[str, List[str]]:
+    bucket = _bucket_from_sqft(_estimate_sqft_from_query(query))
+    q = query.lower()
+    keywords = [k for k in KEYWORD_SIZE_HINTS.keys() if k in q]
+    return bucket, keywords
+
+
+def listing_size(listing: dict) -> str | None:
+    size = listing.get("size")
+    return getattr(size, "value", size)
+
+
+def listing_text(listing: dict) -> str:
+    return (listing.get("description") or "").lower() + " " + (listing.get("title") or "").lower()
+
+
+def listing_keywords(listing: dict) -> Set[str]:
+    text = listing_text(listing)
+    return {k for k in KEYWORD_SIZE_HINTS if k in text}
+
+
 def score_listing(
-    listing: dict, target_bucket: str, target_zip: str | None, keywords: List[str]
+    listing: dict,
+    target_bucket: str,
+    target_zip: str | None,
+    keywords: List[str],
+    relevance: float = 0.0,
 ) -> float:
     score = 0.0
-    size = listing.get("size")
+    size = listing_size(listing)
     if size == target_bucket:
         score += 2.0
-    elif (size, target_bucket) in {("S", "M"), ("M", "S"), ("M", "L"), ("L", "M")}:
+    elif size in ADJACENT_SIZES.get(target_bucket, ()):
         score += 1.0
 
     if target_zip and listing.get("zipCode") == target_zip:
         score += 2.0
 
-    desc = (listing.get("description") or "").lower() + " " + (listing.get("title") or "").lower()
+    desc = listing_text(listing)
     for kw in keywords:
         if kw in desc:
             score += 0.5
 
+    if relevance:
+        score += RELEVANCE_WEIGHT * relevance
+
     price = listing.get("pricePerMonth") or 0
     if price > 0:
         score += 50 / price
@@ -64,24 +99,35 @@ def score_listing(
     return score
 
 
-def match_listings(
-    listings: List[dict], query: str, zip_code: str | None = None
-) -> tuple[List[dict], str]:
-    sqft = _estimate_sqft_from_query(query)
-    bucket = _bucket_from_sqft(sqft)
-    keywords = [k for k in KEYWORD_SIZE_HINTS.keys() if k in query.lower()]
-
-    scored = []
-    for lst in listings:
-        s = score_listing(lst, bucket, zip_code, keywords)
-        scored.append((s, lst))
+def top_k(scored: Iterable[Tuple[float, dict]], k: int) -> List[dict]:
+    """Highest-scoring k listings; ties keep input order, like a stable sort."""
+    best = heapq.nlargest(
+        k, ((s, -i, lst) for i, (s, lst) in enumerate(scored)), key=lambda x: (x[0], x[1])
+    )
+    return [lst for _, _, lst in best]
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = [lst for _, lst in scored[:5]]
 
-    explanation = (
+def explain_match(bucket: str, zip_code: str | None, keywords: List[str]) -> str:
+    return (
         f"Recommended {bucket}-size spaces"
         f"{' near ' + zip_code if zip_code else ''}"
         f" that fit your needs for {', '.join(keywords) if keywords else 'your described items'}."
     )
-    return top, explanation
+
+
+def match_listings(
+    listings: List[dict],
+    query: str,
+    zip_code: str | None = None,
+    k: int = 5,
+    relevance: Optional[Sequence[float]] = None,
+) -> tuple[List[dict], str]:
+    bucket, keywords = parse_query(query)
+    if relevance is None:
+        relevance = [0.0] * len(listings)
+    scored = (
+        (score_listing(lst, bucket, zip_code, keywords, float(rel)), lst)
+        for lst, rel in zip(listings, relevance)
+    )
+    top = top_k(scored, k)
+    return top, explain_match(bucket, zip_code, keywords)
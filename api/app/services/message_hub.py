@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.db import get_db
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class LocalBroker:
+    """In-process pub/sub keyed by reservation id.
+
+    Every subscriber gets a bounded queue; a subscriber that falls behind
+    loses its oldest undelivered messages rather than slowing publishers.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, message: dict) -> None:
+        self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: dict) -> None:
+        for queue in list(self._subscribers.get(channel, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+
+class MongoChangeStreamBroker(LocalBroker):
+    """Fans out inserts on `messages` from a change stream, so every worker
+    sees messages written by any other. Requires a replica set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, channel: str, message: dict) -> None:
+        pass
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with get_db().messages.watch(pipeline) as stream:
+                    async for change in stream:
+                        doc = change["fullDocument"]
+                        self._deliver(doc["reservationId"], doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Message change stream failed, reconnecting")
+                await asyncio.sleep(1)
+
+
+def _create_broker() -> LocalBroker:
+    if settings.message_broker == "mongo":
+        # The change stream reads the Mongo collection the repositories write
+        # to; with any other storage backend there is nothing to watch.
+        if settings.storage_backend != "mongo":
+            raise ValueError("MESSAGE_BROKER=mongo requires STORAGE_BACKEND=mongo")
+        return MongoChangeStreamBroker()
+    return LocalBroker()
+
+
+broker = _create_broker()
@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime, float]
+
+
+class OccupancyTimeline:
+    """Step function of reserved sqft over time for a single listing.
+
+    Reservation boundaries are swept once into elementary segments, and a
+    sparse table over the segment loads answers peak(start, end) in O(log n).
+    """
+
+    def __init__(self, intervals: Iterable[Interval]):
+        deltas: Dict[datetime, float] = {}
+        for start, end, sqft in intervals:
+            if end <= start or sqft <= 0:
+                continue
+            deltas[start] = deltas.get(start, 0.0) + sqft
+            deltas[end] = deltas.get(end, 0.0) - sqft
+
+        self._points: List[datetime] = sorted(deltas)
+        loads: List[float] = []
+        running = 0.0
+        for point in self._points:
+            running += deltas[point]
+            loads.append(max(0.0, running))
+
+        self._table: List[List[float]] = [loads]
+        width = 1
+        while width * 2 <= len(loads):
+            prev = self._table[-1]
+            self._table.append(
+                [max(prev[i], prev[i + width]) for i in range(len(prev) - width)]
+            )
+            width *= 2
+
+    @classmethod
+    def from_reservations(cls, reservations: Iterable[dict]) -> "OccupancyTimeline":
+        return cls(
+            (r["startDate"], r["endDate"], r.get("sqftRequested", 0)) for r in reservations
+        )
+
+    def peak(self, start: datetime, end: datetime) -> float:
+        """Highest reserved sqft at any instant in [start, end)."""
+        if not self._points or end <= start:
+            return 0.0
+        lo = max(0, bisect_right(self._points, start) - 1)
+        hi = bisect_left(self._points, end) - 1
+        if hi < lo:
+            return 0.0
+        level = (hi - lo + 1).bit_length() - 1
+        row = self._table[level]
+        return max(row[lo], row[hi - (1 << level) + 1])
+
+
+def peak_expression(intervals: str, start: datetime, end: Optional[datetime] = None) -> dict:
+    """Aggregation equivalent of OccupancyTimeline.peak for looked-up reservations.
+
+    `intervals` must already be restricted to reservations overlapping the
+    window. The peak of a step function is reached at the window start or at
+    one of the reservation starts inside it, so only those points are probed.
+    """
+    window_start = {"$max": ["$$i.startDate", start]}
+    probes = {
+        "$concatArrays": [[start], {"$map": {"input": intervals, "as": "i", "in": window_start}}]
+    }
+    if end is not None:
+        probes = {"$filter": {"input": probes, "as": "p", "cond": {"$lt": ["$$p", end]}}}
+    load_at = {
+        "$sum": {
+            "$map": {
+                "input": {
+                    "$filter": {
+                        "input": intervals,
+                        "as": "r",
+                        "cond": {
+                            "$and": [
+                                {"$lte": ["$$r.startDate", "$$p"]},
+                                {"$gt": ["$$r.endDate", "$$p"]},
+                            ]
+                        },
+                    }
+                },
+                "as": "r",
+                "in": "$$r.sqftRequested",
+            }
+        }
+    }
+    return {"$max": {"$map": {"input": probes, "as": "p", "in": load_at}}}
@@ -1,44 +1,104 @@
-from typing import Literal
-import random
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import hashlib
+
+import numpy as np
 
 HighDemandZips = {"95112", "95126"}
 LowDemandZips = {"95127", "95128"}
 
 BasePrices = {"S": 60.0, "M": 100.0, "L": 140.0}
 
+HighOccupancy = 0.8
+LowOccupancy = 0.3
 
-def suggest_price(
-    size: Literal["S", "M", "L"],
-    zip_code: str,
-    indoor: bool | None = None,
-) -> tuple[float, float, float, str]:
-    size = size.upper()
-    base = BasePrices.get(size, 100.0)
-    factors = []
-
-    demand_factor = 1.0
-    if zip_code in HighDemandZips:
-        demand_factor = 1.1
-        factors.append("+10% high-demand adjustment")
-    elif zip_code in LowDemandZips:
-        demand_factor = 0.9
-        factors.append("−10% low-demand adjustment")
-
-    indoor_premium = 15.0 if indoor else 0.0
-    if indoor:
-        factors.append("+$15 indoor premium")
+PriceInput = Tuple[str, str, Optional[bool]]
+PriceSuggestion = Tuple[float, float, float, str]
 
-    deterministic = base * demand_factor + indoor_premium
 
-    jitter = random.uniform(0.95, 1.05)
-    suggested = round(deterministic * jitter, 2)
+@lru_cache(maxsize=65_536)
+def input_jitter(size: str, zip_code: str, indoor: bool) -> float:
+    """Multiplier in [0.95, 1.05) derived from the input, so repeat calls agree."""
+    key = f"{size}|{zip_code}|{int(indoor)}".encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return 0.95 + 0.1 * (int.from_bytes(digest, "big") / 2**64)
 
-    min_price = round(deterministic * 0.9, 2)
-    max_price = round(deterministic * 1.2, 2)
 
+def _heuristic_explanation(size: str, zip_code: str, base: float, factors: List[str]) -> str:
     factor_text = " ".join(factors) if factors else "no adjustments"
-    explanation = (
+    return (
         f"We compared similar {size}-size spaces in {zip_code or 'your area'} and recommend this rate. "
         f"Base ${base} {factor_text}. A slight variation is applied so suggestions feel more human."
     )
-    return suggested, min_price, max_price, explanation
+
+
+def _stats_explanation(stats: dict, size: str, zip_code: str, indoor: bool, factors: List[str]) -> str:
+    area = zip_code if stats["scope"] == "zip" else f"the {stats['area']}xx area"
+    kind = "indoor" if indoor else "outdoor"
+    factor_text = " ".join(factors) if factors else "no adjustments"
+    return (
+        f"We compared {stats['listingCount']} similar {kind} {size}-size spaces in {area} "
+        f"(median ${stats['p50']}/month) and recommend this rate. {factor_text}. "
+        f"A slight variation is applied so suggestions feel more human."
+    )
+
+
+def suggest_prices(
+    inputs: Sequence[PriceInput], stats: Optional[Sequence[Optional[dict]]] = None
+) -> List[PriceSuggestion]:
+    """Price many (size, zip, indoor) tuples at once.
+
+    `stats[i]` is the pricing_stats cell for `inputs[i]`, or None to fall back
+    to the zip-list heuristic. Prices are computed column-wise; only the
+    explanations are built per row.
+    """
+    n = len(inputs)
+    if n == 0:
+        return []
+    stats = list(stats) if stats is not None else [None] * n
+    sizes = [size.upper() for size, _, _ in inputs]
+    zips = [zip_code for _, zip_code, _ in inputs]
+    indoor = np.fromiter((bool(i) for _, _, i in inputs), dtype=bool, count=n)
+    has_stats = np.fromiter((s is not None for s in stats), dtype=bool, count=n)
+
+    base = np.fromiter((BasePrices.get(s, 100.0) for s in sizes), dtype=np.float64, count=n)
+    p25, p50, p75, occupancy = (
+        np.fromiter((s[field] if s else 0.0 for s in stats), dtype=np.float64, count=n)
+        for field in ("p25", "p50", "p75", "occupancy")
+    )
+    high_zip = np.fromiter((z in HighDemandZips for z in zips), dtype=bool, count=n)
+    low_zip = np.fromiter((z in LowDemandZips for z in zips), dtype=bool, count=n)
+
+    high = np.where(has_stats, occupancy >= HighOccupancy, high_zip)
+    low = ~high & np.where(has_stats, occupancy <= LowOccupancy, low_zip)
+    demand = np.where(high, 1.1, np.where(low, 0.9, 1.0))
+    premium = np.where(indoor & ~has_stats, 15.0, 0.0)
+
+    deterministic = np.where(has_stats, p50, base) * demand + premium
+    jitter = np.fromiter(
+        (input_jitter(s, z, bool(i)) for s, z, i in zip(sizes, zips, indoor)),
+        dtype=np.float64,
+        count=n,
+    )
+    suggested = np.round(deterministic * jitter, 2)
+    min_price = np.round(np.where(has_stats, np.minimum(p25 * demand, deterministic * 0.9), deterministic * 0.9), 2)
+    max_price = np.round(np.where(has_stats, np.maximum(p75 * demand, deterministic * 1.1), deterministic * 1.2), 2)
+
+    results = []
+    for i in range(n):
+        factors = []
+        cell = stats[i]
+        booked = f" ({cell['occupancy']:.0%} booked)" if cell else ""
+        if high[i]:
+            factors.append(f"+10% high-demand adjustment{booked}")
+        elif low[i]:
+            factors.append(f"−10% low-demand adjustment{booked}")
+        if cell:
+            explanation = _stats_explanation(cell, sizes[i], zips[i], bool(indoor[i]), factors)
+        else:
+            if indoor[i]:
+                factors.append("+$15 indoor premium")
+            explanation = _heuristic_explanation(sizes[i], zips[i], float(base[i]), factors)
+        results.append((float(suggested[i]), float(min_price[i]), float(max_price[i]), explanation))
+    return results
+
@@ -0,0 +1,223 @@
+"""Precomputed pricing statistics per (zipCode, size, indoor).
+
+Each cell in the `pricing_stats` collection holds price percentiles, the
+listing count and booked occupancy for one market segment, plus a
+matching cell for the surrounding 3-digit zip region that serves as the
+fallback when a single zip has too few listings. Each cell also keeps its
+members' contributions (price, sqft, booked sqft per listing), so a change to
+one listing updates its cells from that map instead of re-reading every
+listing in the zip or region; `rebuild` recomputes the whole table.
+
+Occupancy is measured over a forward window: the average share of the
+segment's sqft held by active reservations over the next BOOKING_WINDOW,
+rather than what is held at the moment of writing. Accepted future bookings
+count as demand, and a cell that is not rewritten for a while drifts slowly
+instead of dropping to 0% once the bookings it saw have started.
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories.base import Repositories
+from app.services.matching import listing_size, listing_text
+from app.services.pricing import PriceInput, PriceSuggestion, suggest_prices
+
+MIN_SAMPLES = 3
+BOOKING_WINDOW = timedelta(days=30)
+INDOOR_HINTS = ("indoor", "closet", "room", "climate", "bedroom", "basement", "attic")
+
+CellKey = Tuple[str, str, str, bool]
+
+# Suggestions keyed by (size, zipCode, indoor) plus the versions of the cells
+# they were computed from; refreshing a cell bumps its version, so only the
+# suggestions that read it stop being found (and age out of the LRU).
+suggestion_cache = TTLCache(
+    max_entries=settings.pricing_cache_max_entries,
+    ttl_seconds=settings.pricing_cache_ttl_seconds,
+)
+_cell_versions: Dict[str, int] = {}
+
+
+def is_indoor(listing: dict) -> bool:
+    text = listing_text(listing)
+    return any(hint in text for hint in INDOOR_HINTS)
+
+
+def zip_region(zip_code: str) -> str:
+    return (zip_code or "")[:3]
+
+
+def cell_id(scope: str, area: str, size: str, indoor: bool) -> str:
+    return f"{scope}:{area}:{size}:{int(bool(indoor))}"
+
+
+def lookup_ids(zip_code: str, size: str, indoor: bool) -> List[str]:
+    return [
+        cell_id("zip", zip_code, size, indoor),
+        cell_id("region", zip_region(zip_code), size, indoor),
+    ]
+
+
+def _cell_keys(listing: dict) -> List[CellKey]:
+    zip_code = listing.get("zipCode") or ""
+    size = listing_size(listing)
+    indoor = is_indoor(listing)
+    return [("zip", zip_code, size, indoor), ("region", zip_region(zip_code), size, indoor)]
+
+
+def _member(listing: dict, booked: Dict[str, float]) -> list:
+    """A listing's contribution to its cells: [price, sqft, average booked sqft]."""
+    return [
+        float(listing.get("pricePerMonth") or 0),
+        float(listing.get("sizeSqft") or 100),
+        round(float(booked.get(listing["_id"], 0.0)), 2),
+    ]
+
+
+async def _booked(repos: Repositories, now: datetime, listing_ids: Optional[List[str]] = None) -> Dict[str, float]:
+    return await repos.reservations.booked_sqft(now, now + BOOKING_WINDOW, listing_ids)
+
+
+def _cell_doc(key: CellKey, members: Dict[str, list], now: datetime, version: int = 0) -> dict:
+    scope, area, size, indoor = key
+    rows = np.array(list(members.values()), dtype=np.float64).reshape(-1, 3)
+    prices = rows[:, 0][rows[:, 0] > 0]
+    total_sqft = float(rows[:, 1].sum())
+    booked_sqft = float(rows[:, 2].sum())
+    doc = {
+        "_id": cell_id(scope, area, size, indoor),
+        "scope": scope,
+        "area": area,
+        "size": size,
+        "indoor": indoor,
+        "listingCount": int(len(prices)),
+        "totalSqft": total_sqft,
+        "bookedSqft": booked_sqft,
+        "occupancy": round(booked_sqft / total_sqft, 4) if total_sqft else 0.0,
+        "updatedAt": now,
+        "summaryVersion": version,
+    }
+    if len(prices):
+        p25, p50, p75 = np.percentile(prices, [25, 50, 75])
+        doc.update(p25=round(float(p25), 2), p50=round(float(p50), 2), p75=round(float(p75), 2))
+    return doc
+
+
+async def refresh_cells(repos: Repositories, listings: Iterable[dict]) -> None:
+    """Update the cells the given listings (old or new versions) fall in.
+
+    Each listing's current version, if it still exists, is written into the
+    cells it now belongs to and removed from the others; each summary is
+    recomputed from the member map returned by that write and tagged with
+    the version it bumped, so a slower concurrent refresh cannot replace it
+    with an older one.
+    """
+    listings = list(listings)
+    if not listings:
+        return
+    now = datetime.utcnow()
+    current = {l["_id"]: l for l in await repos.listings.get_many(list({l["_id"] for l in listings}))}
+    booked = await _booked(repos, now, list(current))
+
+    keys: Dict[str, CellKey] = {}
+    updates: Dict[str, Dict[str, Optional[list]]] = defaultdict(dict)
+    for listing in listings:
+        for key in _cell_keys(listing):
+            keys[cell_id(*key)] = key
+            updates[cell_id(*key)][listing["_id"]] = None
+    for listing in current.values():
+        member = _member(listing, booked)
+        for key in _cell_keys(listing):
+            keys[cell_id(*key)] = key
+            updates[cell_id(*key)][listing["_id"]] = member
+
+    docs = []
+    for cid, changes in updates.items():
+        members, version = await repos.pricing_stats.update_members(cid, changes)
+        docs.append(_cell_doc(keys[cid], members, now, version))
+        _cell_versions[cid] = _cell_versions.get(cid, 0) + 1
+    await repos.pricing_stats.set_summaries(docs)
+
+
+async def refresh_for_listing_ids(repos: Repositories, listing_ids: Iterable[str]) -> None:
+    ids = list(set(listing_ids))
+    if not ids:
+        return
+    await refresh_cells(repos, await repos.listings.get_many(ids))
+
+
+async def rebuild(repos: Repositories) -> int:
+    now = datetime.utcnow()
+    booked = await _booked(repos, now)
+    cells: Dict[CellKey, Dict[str, list]] = defaultdict(dict)
+    for listing in await repos.listings.all():
+        member = _member(listing, booked)
+        for key in _cell_keys(listing):
+            cells[key][listing["_id"]] = member
+
+    docs = [dict(_cell_doc(key, members, now), members=members, version=0) for key, members in cells.items()]
+    await repos.pricing_stats.replace(docs)
+    await repos.pricing_stats.delete_except([doc["_id"] for doc in docs])
+    suggestion_cache.clear()
+    return len(docs)
+
+
+async def rebuild_if_needed(repos: Repositories) -> None:
+    """Fill the table on first startup, or when cells predate member maps."""
+    stats = repos.pricing_stats
+    if await stats.count() == 0 or await stats.count(missing_members=True):
+        await rebuild(repos)
+
+
+async def find_stats_many(repos: Repositories, inputs: List[PriceInput]) -> List[Optional[dict]]:
+    """Most specific cell with enough listings for each input: the zip, then its region."""
+    candidates = [lookup_ids(zip_code, size, bool(indoor)) for size, zip_code, indoor in inputs]
+    ids = list({cid for cids in candidates for cid in cids})
+    rows = await repos.pricing_stats.get_many(ids)
+    usable = {r["_id"]: r for r in rows if r.get("listingCount", 0) >= MIN_SAMPLES}
+    return [next((usable[cid] for cid in cids if cid in usable), None) for cids in candidates]
+
+
+async def suggest_many(repos: Repositories, inputs: List[PriceInput]) -> List[PriceSuggestion]:
+    """Suggestions for each input, memoized per distinct (size, zip, indoor)."""
+    keys = [(size.upper(), zip_code, bool(indoor)) for size, zip_code, indoor in inputs]
+    epoch = suggestion_cache.epoch()
+    results: Dict[PriceInput, PriceSuggestion] = {}
+    missing = []
+    cache_keys = {}
+    for key in dict.fromkeys(keys):
+        size, zip_code, indoor = key
+        versions = tuple(_cell_versions.get(cid, 0) for cid in lookup_ids(zip_code, size, indoor))
+        cache_keys[key] = (key, versions)
+        cached = suggestion_cache.get(cache_keys[key])
+        if cached is None:
+            missing.append(key)
+        else:
+            results[key] = cached
+    if missing:
+        cells = await find_stats_many(repos, missing)
+        for key, suggestion in zip(missing, suggest_prices(missing, cells)):
+            results[key] = suggestion
+            suggestion_cache.set(cache_keys[key], suggestion, epoch)
+    return [results[key] for key in keys]
+
+
+async def _main(argv: List[str] | None = None) -> int:
+    from app.repositories import get_repositories
+
+    parser = argparse.ArgumentParser(description="Maintain the pricing statistics table")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    count = await rebuild(get_repositories())
+    print(f"Pricing statistics rebuilt: {count} cells.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
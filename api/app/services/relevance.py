@@ -0,0 +1,102 @@
+"""BM25 relevance over listing titles and descriptions.
+
+Postings are kept per term as {row: term frequency} while listings change,
+and compacted on demand into parallel NumPy arrays (a column of a sparse
+term-document matrix), so scoring a query touches only the rows that share
+a term with it.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "i", "in", "is", "it", "its", "my", "need", "of", "on", "or", "our", "some",
+    "that", "the", "their", "this", "to", "was", "we", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._compact: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_len = np.zeros(1024, dtype=np.float64)
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def upsert(self, row: int, text: str) -> None:
+        self.remove(row)
+        terms = Counter(tokenize(text))
+        if row >= len(self._doc_len):
+            grown = np.zeros(max(row + 1, len(self._doc_len) * 2), dtype=np.float64)
+            grown[: len(self._doc_len)] = self._doc_len
+            self._doc_len = grown
+        length = sum(terms.values())
+        self._doc_terms[row] = terms
+        self._doc_len[row] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[row] = tf
+            self._compact.pop(term, None)
+
+    def remove(self, row: int) -> None:
+        terms = self._doc_terms.pop(row, None)
+        if terms is None:
+            return
+        self._total_len -= int(self._doc_len[row])
+        self._doc_len[row] = 0
+        for term in terms:
+            postings = self._postings[term]
+            del postings[row]
+            if not postings:
+                del self._postings[term]
+            self._compact.pop(term, None)
+
+    def _term_column(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        column = self._compact.get(term)
+        if column is None:
+            postings = self._postings[term]
+            rows = np.fromiter(postings.keys(), dtype=np.intp, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            column = self._compact[term] = (rows, tfs)
+        return column
+
+    def query_terms(self, query: str) -> List[str]:
+        return [t for t in dict.fromkeys(tokenize(query)) if t in self._postings]
+
+    def scores(self, query: str, n_rows: int) -> np.ndarray:
+        """Dense BM25 scores for rows [0, n_rows), scaled so the best match is 1."""
+        scores = np.zeros(n_rows, dtype=np.float64)
+        n_docs = len(self._doc_terms)
+        if not n_docs:
+            return scores
+        avg_len = self._total_len / n_docs or 1.0
+        for term in self.query_terms(query):
+            rows, tfs = self._term_column(term)
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._doc_len[rows] / avg_len)
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        best = scores.max() if n_rows else 0.0
+        if best > 0:
+            scores /= best
+        return scores
@@ -0,0 +1,144 @@
+"""Content-addressed storage for uploaded listing images.
+
+Uploads are read in chunks, written to a temp file off the event loop and
+hashed as they go; the finished file is renamed to `<sha256><ext>`, so the
+same photo uploaded twice is stored once. Temp files live in a sibling of
+`upload_dir` rather than inside it, so a half-written or rejected upload is
+never reachable under `/uploads`, while the rename stays on one filesystem.
+
+`UploadLimitMiddleware` caps the request body itself: the multipart parser
+spools the whole file before the route runs, so the check in `store_image`
+alone would only limit what gets kept, not what a client can send.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+# Room for multipart boundaries and part headers on top of the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+UPLOAD_PATHS = ("/listings/upload",)
+
+# Leading bytes of each accepted format, mapped to the extension it is stored under.
+SIGNATURES = {
+    b"\xff\xd8\xff": ".jpg",
+    b"\x89PNG\r\n\x1a\n": ".png",
+}
+
+
+def upload_dir() -> Path:
+    path = Path(settings.upload_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def upload_tmp_dir() -> Path:
+    directory = Path(settings.upload_dir)
+    path = directory.parent / f".{directory.name}-tmp"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _sniff(head: bytes) -> str | None:
+    for signature, ext in SIGNATURES.items():
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def _too_large() -> HTTPException:
+    limit_mb = round(settings.max_upload_bytes / (1024 * 1024), 1)
+    return HTTPException(status_code=413, detail=f"Images must be {limit_mb:g} MB or smaller")
+
+
+def _commit(tmp_path: str, dest: Path) -> None:
+    if dest.exists():
+        os.unlink(tmp_path)
+    else:
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest)
+
+
+async def store_image(file: UploadFile) -> str:
+    """Stream `file` to disk and return its content-addressed filename."""
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise _too_large()
+
+    directory = upload_dir()
+    fd, tmp_path = tempfile.mkstemp(dir=upload_tmp_dir(), prefix="upload-", suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    written = 0
+    ext = None
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            if ext is None:
+                ext = _sniff(chunk)
+                if ext is None:
+                    raise HTTPException(status_code=400, detail="Only JPEG and PNG images are allowed")
+            written += len(chunk)
+            if written > settings.max_upload_bytes:
+                raise _too_large()
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        if ext is None:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        await run_in_threadpool(out.close)
+        filename = f"{digest.hexdigest()}{ext}"
+        await run_in_threadpool(_commit, tmp_path, directory / filename)
+        return filename
+    except BaseException:
+        out.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class UploadLimitMiddleware:
+    """Rejects upload requests whose body exceeds the image limit.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; otherwise bytes are counted as the parser pulls them and
+    the request fails with 413 as soon as the limit is crossed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in UPLOAD_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.max_upload_bytes + MULTIPART_OVERHEAD
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    error = _too_large()
+                    response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the route's body parsing, so FastAPI's
+                    # exception handling turns it into the 413 response.
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,149 @@
+"""Columnar listing snapshot and vectorized scorer for recommendations.
+
+`ListingSnapshot.scores` computes exactly what `score_listing` computes, one
+column at a time, and `top_k_rows` reproduces the stable descending sort used
+by `match_listings`, so both paths rank listings identically.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.matching import (
+    KEYWORD_SIZE_HINTS,
+    RELEVANCE_WEIGHT,
+    explain_match,
+    listing_keywords,
+    listing_size,
+    parse_query,
+)
+
+KEYWORD_BITS: Dict[str, int] = {k: 1 << i for i, k in enumerate(KEYWORD_SIZE_HINTS)}
+_POPCOUNT = np.array([bin(i).count("1") for i in range(1 << len(KEYWORD_BITS))], dtype=np.float64)
+
+SIZE_CODES = {"S": 0, "M": 1, "L": 2}
+_UNKNOWN_SIZE = 3
+# SIZE_SCORES[target bucket][listing size]; the last column is an unknown size.
+SIZE_SCORES = np.array(
+    [[2.0, 1.0, 0.0, 0.0], [1.0, 2.0, 1.0, 0.0], [0.0, 1.0, 2.0, 0.0]], dtype=np.float64
+)
+
+_INITIAL_CAPACITY = 1024
+
+
+def keyword_mask(keywords) -> int:
+    mask = 0
+    for keyword in keywords:
+        mask |= KEYWORD_BITS.get(keyword, 0)
+    return mask
+
+
+class ListingSnapshot:
+    """Listing columns as NumPy arrays, one row per listing.
+
+    Rows can be appended, overwritten and retired in place so the catalog
+    index can keep the snapshot current without rebuilding it.
+    """
+
+    def __init__(self, listings: Optional[List[dict]] = None):
+        capacity = max(_INITIAL_CAPACITY, len(listings or ()))
+        self.listings: List[Optional[dict]] = []
+        self.size_codes = np.full(capacity, _UNKNOWN_SIZE, dtype=np.int8)
+        self.zip_codes = np.full(capacity, -1, dtype=np.int32)
+        self.price_scores = np.zeros(capacity, dtype=np.float64)
+        self.keyword_masks = np.zeros(capacity, dtype=np.uint16)
+        self.live = np.zeros(capacity, dtype=bool)
+        self._zip_ids: Dict[str, int] = {}
+        for listing in listings or ():
+            self.append(listing)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def _grow(self) -> None:
+        capacity = len(self.size_codes) * 2
+        for name in ("size_codes", "zip_codes", "price_scores", "keyword_masks", "live"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _zip_id(self, zip_code) -> int:
+        if zip_code is None:
+            return -1
+        return self._zip_ids.setdefault(zip_code, len(self._zip_ids))
+
+    def append(self, listing: dict) -> int:
+        row = len(self.listings)
+        if row == len(self.size_codes):
+            self._grow()
+        self.listings.append(None)
+        self.update(row, listing)
+        return row
+
+    def update(self, row: int, listing: dict) -> None:
+        self.listings[row] = listing
+        self.size_codes[row] = SIZE_CODES.get(listing_size(listing), _UNKNOWN_SIZE)
+        self.zip_codes[row] = self._zip_id(listing.get("zipCode"))
+        price = listing.get("pricePerMonth") or 0
+        self.price_scores[row] = 50 / price if price > 0 else 0.0
+        self.keyword_masks[row] = keyword_mask(listing_keywords(listing))
+        self.live[row] = True
+
+    def delete(self, row: int) -> None:
+        self.listings[row] = None
+        self.live[row] = False
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.live[: len(self.listings)])
+
+    def scores(
+        self,
+        bucket: str,
+        zip_code: Optional[str],
+        keywords: List[str],
+        rows: np.ndarray,
+        relevance: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        score = SIZE_SCORES[SIZE_CODES[bucket]][self.size_codes[rows]]
+        if zip_code:
+            zip_id = self._zip_ids.get(zip_code)
+            if zip_id is not None:
+                score = score + np.where(self.zip_codes[rows] == zip_id, 2.0, 0.0)
+        query_mask = keyword_mask(keywords)
+        if query_mask:
+            score = score + 0.5 * _POPCOUNT[self.keyword_masks[rows] & query_mask]
+        if relevance is not None:
+            score = score + RELEVANCE_WEIGHT * relevance
+        return score + self.price_scores[rows]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k best scores, ordered like a stable descending sort."""
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+def match_snapshot(
+    snapshot: ListingSnapshot,
+    query: str,
+    zip_code: Optional[str] = None,
+    k: int = 5,
+    rows: Optional[np.ndarray] = None,
+    relevance: Optional[np.ndarray] = None,
+) -> Tuple[List[dict], str]:
+    """`relevance`, when given, holds one text relevance score per snapshot row."""
+    bucket, keywords = parse_query(query)
+    if rows is None:
+        rows = snapshot.live_rows()
+    row_relevance = relevance[rows] if relevance is not None else None
+    scores = snapshot.scores(bucket, zip_code, keywords, rows, row_relevance)
+    best = rows[top_k_rows(scores, k)]
+    return [snapshot.listings[i] for i in best], explain_match(bucket, zip_code, keywords)
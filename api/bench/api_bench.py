@@ -0,0 +1,380 @@
+"""End-to-end API benchmark: drives the real routes and records latency per scenario.
+
+The app runs in-process (lifespan included) over httpx's ASGI transport, or
+against a running server with --base-url. Data comes from seed.py's --scale
+generator, written to a dedicated database so the benchmark never touches
+real data, or loaded into the in-memory storage backend with --backend
+memory (no MongoDB needed). A --base-url server is expected to be seeded
+already (seed.py --scale N --seed S, matching --scale and --seed here);
+--reseed-remote reseeds it only when it shares --mongodb-uri and --database.
+Mongo ops per request are read from /metrics (with the admin token) before
+and after each scenario.
+
+Run from api/:  python -m bench.api_bench [--backend memory] [--scale 2] [--concurrency 16]
+                                          [--requests 500] [--output bench_results.json]
+Requires httpx (pip install httpx); the mongo backend needs a reachable MongoDB (--mongodb-uri).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+QUERIES = [
+    "I need room for 2 bikes and some boxes",
+    "a couch and a bed",
+    "small box of documents",
+    "furniture from a 3 bedroom apartment",
+]
+LISTING_FILTERS = ("zipCode", "size", "dates", "price")
+PASSWORD = "password123"
+
+Request = Tuple[str, str, dict]
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks; `ordered` must be sorted."""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def mongo_ops(metrics_text: str) -> float:
+    total = 0.0
+    for line in metrics_text.splitlines():
+        if line.startswith("mongo_commands_total"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+async def read_mongo_ops(client, ctx: "Context") -> Optional[float]:
+    response = await client.get("/metrics", headers={"X-Admin-Token": ctx.admin_token})
+    return mongo_ops(response.text) if response.status_code == 200 else None
+
+
+class Context:
+    """Tokens and ids gathered during setup that scenarios draw requests from."""
+
+    def __init__(self, rng: random.Random, admin_token: str = "") -> None:
+        self.rng = rng
+        self.admin_token = admin_token
+        self.renter_tokens: List[str] = []
+        self.renter_emails: List[str] = []
+        self.listings: List[dict] = []
+        self.zip_codes: List[str] = []
+        # (renter token, reservation id) pairs the renter is a participant of.
+        self.conversations: List[Tuple[str, str]] = []
+
+    def renter(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.renter_tokens)}"}
+
+
+def listing_filters(combo: Tuple[str, ...]) -> Callable[[Context], Request]:
+    def build(ctx: Context) -> Request:
+        rng = ctx.rng
+        params: Dict[str, object] = {"limit": 20}
+        if "zipCode" in combo:
+            params["zipCode"] = rng.choice(ctx.zip_codes)
+        if "size" in combo:
+            params["size"] = rng.choice("SML")
+        if "dates" in combo:
+            start = datetime.utcnow().date() + timedelta(days=rng.randint(0, 60))
+            params["startDate"] = start.isoformat()
+            params["endDate"] = (start + timedelta(days=rng.randint(7, 90))).isoformat()
+        if "price" in combo:
+            low = rng.choice([0, 40, 80])
+            params["priceMin"] = low
+            params["priceMax"] = low + rng.choice([60, 120])
+        return "GET", "/listings/", {"params": params}
+
+    return build
+
+
+def create_reservation(ctx: Context) -> Request:
+    rng = ctx.rng
+    listing = rng.choice(ctx.listings)
+    today = datetime.utcnow()
+    earliest = max(today, _parse(listing.get("availableFrom")) or today) + timedelta(days=1)
+    latest = _parse(listing.get("availableTo")) or earliest + timedelta(days=180)
+    start = earliest + timedelta(days=rng.randint(0, max(0, (latest - earliest).days - 31)))
+    end = min(start + timedelta(days=rng.randint(7, 30)), latest)
+    payload = {
+        "listingId": listing["_id"],
+        "startDate": start.date().isoformat(),
+        "endDate": end.date().isoformat(),
+        "sqftRequested": rng.randint(1, max(1, min(10, int(listing.get("sizeSqft") or 10)))),
+    }
+    return "POST", "/reservations/", {"json": payload, "headers": ctx.renter()}
+
+
+def list_reservations(ctx: Context) -> Request:
+    return "GET", "/reservations/", {"headers": ctx.renter()}
+
+
+def send_message(ctx: Context) -> Request:
+    token, reservation_id = ctx.rng.choice(ctx.conversations)
+    payload = {"reservationId": reservation_id, "content": "Is the space still available next week?"}
+    return "POST", "/messages/", {"json": payload, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+def list_messages(ctx: Context) -> Request:
+    token, reservation_id = ctx.rng.choice(ctx.conversations)
+    return "GET", f"/messages/{reservation_id}", {"headers": {"Authorization": f"Bearer {token}"}}
+
+
+def recommend(ctx: Context) -> Request:
+    payload = {"query": ctx.rng.choice(QUERIES)}
+    if ctx.rng.random() < 0.5:
+        payload["zipCode"] = ctx.rng.choice(ctx.zip_codes)
+    return "POST", "/matching/recommend", {"json": payload}
+
+
+def login(ctx: Context) -> Request:
+    form = {"username": ctx.rng.choice(ctx.renter_emails), "password": PASSWORD}
+    return "POST", "/auth/login", {"data": form}
+
+
+def scenarios() -> List[Tuple[str, Callable[[Context], Request]]]:
+    """Every combination of listing filters, then the other route families."""
+    found: List[Tuple[str, Callable[[Context], Request]]] = []
+    for size in range(len(LISTING_FILTERS) + 1):
+        for combo in itertools.combinations(LISTING_FILTERS, size):
+            found.append((f"GET /listings [{'+'.join(combo) or 'none'}]", listing_filters(combo)))
+    found += [
+        ("POST /reservations", create_reservation),
+        ("GET /reservations", list_reservations),
+        ("POST /messages", send_message),
+        ("GET /messages/{id}", list_messages),
+        ("POST /matching/recommend", recommend),
+        ("POST /auth/login", login),
+    ]
+    return found
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.rstrip("Z")) if value else None
+
+
+async def setup(client, ctx: Context, user_count: int, renters: int) -> None:
+    from seed import HOST_SHARE
+
+    host_count = max(1, int(user_count * HOST_SHARE))
+    emails = [f"user{i}@example.com" for i in range(host_count, user_count)]
+    ctx.renter_emails = ctx.rng.sample(emails, min(renters, len(emails)))
+    for email in ctx.renter_emails:
+        response = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        ctx.renter_tokens.append(token)
+        mine = await client.get("/reservations/", headers={"Authorization": f"Bearer {token}"})
+        mine.raise_for_status()
+        ctx.conversations += [(token, reservation["_id"]) for reservation in mine.json()[:20]]
+
+    cursor = None
+    while len(ctx.listings) < 2000:
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        page = await client.get("/listings/", params=params)
+        page.raise_for_status()
+        body = page.json()
+        ctx.listings += [item for item in body["items"] if item.get("sizeSqft")]
+        cursor = body.get("nextCursor")
+        if not cursor:
+            break
+    ctx.zip_codes = sorted({listing["zipCode"] for listing in ctx.listings})
+    if not ctx.listings or not ctx.conversations:
+        raise SystemExit("No listings or reservations to benchmark against; seed with --scale first.")
+
+
+async def run_scenario(
+    client, ctx: Context, name: str, build: Callable[[Context], Request], requests: int, concurrency: int
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            method, url, kwargs = build(ctx)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[str(response.status_code)] += 1
+                if response.status_code >= 500:
+                    errors += 1
+            except Exception:
+                statuses["exception"] += 1
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    ops_before = await read_mongo_ops(client, ctx)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ops_after = await read_mongo_ops(client, ctx)
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughputRps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latencyMs": {
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "mean": round(statistics.fmean(ms), 2) if ms else 0.0,
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+        "mongoOpsPerRequest": (
+            round((ops_after - ops_before) / len(latencies), 2)
+            if latencies and ops_before is not None and ops_after is not None
+            else None
+        ),
+        "statuses": dict(sorted(statuses.items())),
+        "errors": errors,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from app.core.config import settings
+    from seed import USERS_PER_UNIT
+
+    anchor = datetime.combine(datetime.utcnow().date(), datetime.min.time()) + timedelta(hours=12)
+    if args.backend == "memory":
+        from app.repositories import get_repositories
+        from app.services import pricing_stats
+        from seed import generate_documents
+
+        repos = get_repositories()
+        for name, doc in generate_documents(max(args.scale, 1), args.seed, anchor):
+            repos.collections[name].load(doc)
+        await pricing_stats.rebuild(repos)
+    elif args.scale and should_seed(args):
+        from seed import generate
+
+        await generate(args.scale, args.seed, anchor, 5000, 8, drop=True)
+
+    started_at = datetime.utcnow().isoformat() + "Z"
+    ctx = Context(random.Random(args.seed), settings.admin_token)
+    selected = [(name, build) for name, build in scenarios() if not args.only or any(s in name for s in args.only)]
+    results = []
+
+    async def drive(client) -> None:
+        await setup(client, ctx, max(args.scale, 1) * USERS_PER_UNIT, args.renters)
+        for name, build in selected:
+            if args.warmup:
+                await run_scenario(client, ctx, name, build, args.warmup, args.concurrency)
+            result = await run_scenario(client, ctx, name, build, args.requests, args.concurrency)
+            results.append(result)
+            latency = result["latencyMs"]
+            print(
+                f"{name:<44} {result['throughputRps']:>8} req/s  p50 {latency['p50']:>7.2f}  "
+                f"p95 {latency['p95']:>7.2f}  p99 {latency['p99']:>7.2f} ms  "
+                f"{result['mongoOpsPerRequest']} ops/req  {result['statuses']}"
+            )
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+            await drive(client)
+    else:
+        from main import app, lifespan
+
+        transport = httpx.ASGITransport(app=app)
+        async with lifespan(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                await drive(client)
+
+    return {
+        "startedAt": started_at,
+        "config": {
+            "target": args.base_url or "in-process",
+            "backend": settings.storage_backend,
+            "database": settings.database_name if settings.storage_backend == "mongo" and not args.base_url else None,
+            "seeded": args.backend == "memory" or bool(args.scale and should_seed(args)),
+            "scale": args.scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "environment": {"python": sys.version.split()[0], "platform": platform.platform()},
+        "scenarios": results,
+    }
+
+
+def should_seed(args: argparse.Namespace) -> bool:
+    # A remote server may use another database than the one this process
+    # would write to, so it is only reseeded on request.
+    if args.no_seed:
+        return False
+    return not args.base_url or args.reseed_remote
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end Spacio API benchmark")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo", help="storage backend")
+    parser.add_argument("--mongodb-uri", default=None, help="MongoDB to benchmark against (default MONGODB_URI)")
+    parser.add_argument("--database", default="spacio_bench", help="database to seed and query (default spacio_bench)")
+    parser.add_argument("--scale", type=int, default=2, help="seed.py --scale units to generate (default 2)")
+    parser.add_argument("--no-seed", action="store_true", help="reuse data already in --database")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--renters", type=int, default=20, help="renter accounts to spread requests over")
+    parser.add_argument("--only", nargs="*", help="run scenarios whose name contains any of these")
+    parser.add_argument("--base-url", default=None, help="benchmark a running, already seeded server instead of in-process")
+    parser.add_argument(
+        "--reseed-remote",
+        action="store_true",
+        help="with --base-url, drop and reseed --database first (the server must use the same database)",
+    )
+    parser.add_argument(
+        "--admin-token", default=None, help="X-Admin-Token for /metrics (default ADMIN_TOKEN)"
+    )
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    args = parser.parse_args(argv)
+    if args.backend == "memory" and args.base_url:
+        parser.error("--backend memory runs the app in-process; it cannot be combined with --base-url")
+    if args.reseed_remote and (not args.base_url or args.no_seed):
+        parser.error("--reseed-remote needs --base-url and cannot be combined with --no-seed")
+
+    # Settings are read at import time, so the environment is set before importing the app.
+    if args.mongodb_uri:
+        os.environ["MONGODB_URI"] = args.mongodb_uri
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ.setdefault("HOLD_SWEEP_ENABLED", "false")
+    if args.admin_token:
+        os.environ["ADMIN_TOKEN"] = args.admin_token
+    elif not args.base_url:
+        # /metrics needs the admin token; give the in-process app a throwaway one.
+        os.environ.setdefault("ADMIN_TOKEN", secrets.token_hex(16))
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
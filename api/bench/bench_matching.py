@@ -0,0 +1,70 @@
+"""Microbenchmark: score_listing/match_listings vs the vectorized snapshot scorer.
+
+Run from api/:  python -m bench.bench_matching [--sizes 1000 100000 1000000]
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from app.services.matching import KEYWORD_SIZE_HINTS, match_listings
+from app.services.vector_matching import ListingSnapshot, match_snapshot
+
+QUERIES = [
+    ("I need room for 2 bikes and some boxes", "94110"),
+    ("a couch and a bed", None),
+    ("small box of documents", "92507"),
+    ("furniture from a 3 bedroom apartment", "92618"),
+]
+FILLER = ["secure", "garage", "closet", "indoor", "climate", "shelf", "spare", "room", "covered"]
+
+
+def make_listings(n: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    words = list(KEYWORD_SIZE_HINTS) + FILLER
+    zips = [f"9{rng.randint(0, 9999):04d}" for _ in range(max(10, n // 50))] + ["94110", "92507", "92618"]
+    return [
+        {
+            "_id": str(i),
+            "size": rng.choice("SML"),
+            "zipCode": rng.choice(zips),
+            "title": " ".join(rng.sample(words, 2)),
+            "description": " ".join(rng.sample(words, 5)),
+            "pricePerMonth": rng.choice([0, 45, 60, 75.5, 90, 120, 150, 199.99]),
+        }
+        for i in range(n)
+    ]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    print(f"{'listings':>10} {'python ms':>11} {'build ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in sizes:
+        listings = make_listings(n)
+        build_ms = _best_of(lambda: ListingSnapshot(listings), 1)
+        snapshot = ListingSnapshot(listings)
+
+        for query, zip_code in QUERIES:
+            expected, _ = match_listings(listings, query, zip_code)
+            actual, _ = match_snapshot(snapshot, query, zip_code)
+            assert [l["_id"] for l in expected] == [l["_id"] for l in actual], (n, query)
+
+        py_ms = _best_of(lambda: [match_listings(listings, q, z) for q, z in QUERIES], repeat) / len(QUERIES)
+        np_ms = _best_of(lambda: [match_snapshot(snapshot, q, z) for q, z in QUERIES], repeat) / len(QUERIES)
+        print(f"{n:>10} {py_ms:>11.2f} {build_ms:>10.1f} {np_ms:>10.3f} {py_ms / np_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
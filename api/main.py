@@ -1,17 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 import os
 
 from app.core.config import settings
-from app.routers import auth, listings, reservations, messages, pricing, matching, verification
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.security import shutdown_hash_pool
+from app.core.static import CachedStaticFiles
+from app.deps.admin import require_admin
+from app.repositories import get_repositories
+from app.services import capacity, pricing_stats
+from app.services.derivatives import shutdown_derivative_pool
+from app.services.hold_expiry import sweeper
+from app.services.message_hub import broker
+from app.services.uploads import UploadLimitMiddleware
+from app.routers import admin, auth, images, listings, reservations, messages, pricing, matching, verification
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    repos = get_repositories()
+    await repos.prepare()
+    await broker.start()
+    rebuild_tasks = [
+        asyncio.create_task(capacity.rebuild_if_needed(repos)),
+        asyncio.create_task(pricing_stats.rebuild_if_needed(repos)),
+    ]
+    if settings.hold_sweep_enabled:
+        sweeper.start()
+    yield
+    for task in rebuild_tasks:
+        task.cancel()
+    await sweeper.stop()
+    await broker.stop()
+    shutdown_hash_pool()
+    shutdown_derivative_pool()
+
 
 app = FastAPI(
     title="Spacio API",
     version="0.1.0",
     description="Community-powered storage MVP",
+    lifespan=lifespan,
 )
 
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -19,6 +56,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health")
@@ -26,6 +65,16 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_admin)],
+)
+async def metrics() -> str:
+    return registry.render(extra=await admin.stats())
+
+
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(listings.router, prefix="/listings", tags=["listings"])
 app.include_router(reservations.router, prefix="/reservations", tags=["reservations"])
@@ -33,9 +82,12 @@ app.include_router(messages.router, prefix="/messages", tags=["messages"])
 app.include_router(pricing.router, prefix="/pricing", tags=["pricing"])
 app.include_router(matching.router, prefix="/matching", tags=["matching"])
 app.include_router(verification.router, prefix="/verification", tags=["verification"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+# Registered before the /images mount so /images/{id}/{width} reaches the variant route.
+app.include_router(images.router, prefix="/images", tags=["images"])
 
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+os.makedirs(settings.upload_dir, exist_ok=True)
+app.mount("/uploads", CachedStaticFiles(directory=settings.upload_dir), name="uploads")
 
-os.makedirs("images", exist_ok=True)
-app.mount("/images", StaticFiles(directory="images"), name="images")
+os.makedirs(settings.image_dir, exist_ok=True)
+app.mount("/images", CachedStaticFiles(directory=settings.image_dir), name="images")
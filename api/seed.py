@@ -1,11 +1,23 @@
+import argparse
 import asyncio
-from datetime import datetime, timedelta
-from uuid import uuid4
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 
 from app.core.config import settings
 from app.core.security import get_password_hash
+from app.indexes import ensure_indexes
+from app.repositories.base import ACTIVE_STATUSES, LEDGER, STATS, ledger_key
+from app.repositories.mongo import MongoRepositories
+from app.routers.reservations import _calculate_costs
+from app.services import capacity, pricing_stats
+from app.services.pricing import BasePrices
 
 
 async def seed():
@@ -375,10 +387,335 @@ async def seed():
     )
     await db.listings.insert_many(listings)
 
+    # Listings were replaced, so rebuild what is derived from them.
+    repos = MongoRepositories(db)
+    await capacity.rebuild(repos)
+    await pricing_stats.rebuild(repos)
+
     print("Seed complete.")
     print(f"All listings assigned to: adivy001@ucr.edu")
     print("Renter login: renter@example.com / password123")
 
 
+# --- Synthetic data at scale -------------------------------------------------
+#
+# One unit of --scale is 100 users, 50 listings and about 1,000 reservations, so
+# `--scale 1000` writes ~1M reservations. Everything is drawn from one
+# random.Random(seed), so a seed and anchor date always produce the same data.
+
+USERS_PER_UNIT = 100
+LISTINGS_PER_UNIT = 50
+HOST_SHARE = 0.2
+RESERVATIONS_PER_LISTING = (12, 36)
+GENERATED_COLLECTIONS = ["users", "listings", "reservations", "messages", LEDGER, STATS]
+
+KINDS = [
+    ("Garage Bay", False, "/images/garage-img.jpg"),
+    ("Carport Spot", False, "/images/garage-img.jpg"),
+    ("Driveway Spot", False, "/images/garage-img.jpg"),
+    ("Backyard Shed", False, "/images/garage-img.jpg"),
+    ("Closet", True, "/images/closet-img.webp"),
+    ("Spare Room", True, "/images/closet-img.webp"),
+    ("Basement Corner", True, "/images/closet-img.webp"),
+    ("Attic Space", True, "/images/closet-img.webp"),
+]
+ADJECTIVES = ["Secure", "Clean", "Spacious", "Compact", "Covered", "Private", "Dry", "Climate-Controlled", "Quiet"]
+USES = [
+    "bikes and sports gear", "moving boxes", "seasonal decorations", "documents and files",
+    "small furniture", "camping equipment", "tools", "a motorcycle", "student belongings",
+]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Riley", "Casey", "Morgan", "Jamie", "Avery", "Quinn", "Drew", "Parker"]
+LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Patel", "Kim", "Lopez", "Chen", "Johnson", "Singh", "Brown", "Davis", "Khan"]
+MESSAGES = [
+    "Hi! Is the space still available for these dates?",
+    "Yes, it is. When would you like to drop things off?",
+    "Would Saturday morning work?",
+    "Saturday works. The side gate code will be sent the day before.",
+    "Great, thanks! How much clearance is there for tall items?",
+    "About seven feet, so most furniture fits.",
+    "Dropped everything off, thanks again.",
+]
+SIZE_SQFT = {"S": (20, 60), "M": (80, 160), "L": (170, 320)}
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+class BatchWriter:
+    """Buffers documents and writes them with unordered insert_many, a few batches at a time."""
+
+    def __init__(self, collection, batch_size: int, slots: asyncio.Semaphore):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.slots = slots
+        self.buffer: List[dict] = []
+        self.tasks: set = set()
+        self.inserted = 0
+        self.duplicates = 0
+
+    async def add(self, doc: dict) -> None:
+        self.buffer.append(doc)
+        if len(self.buffer) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        await self.slots.acquire()
+        task = asyncio.create_task(self._insert(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _insert(self, batch: List[dict]) -> None:
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            self.inserted += len(result.inserted_ids)
+        except BulkWriteError as exc:
+            # Re-running a seed without --drop only collides on _id/email; anything else is real.
+            errors = exc.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            self.inserted += exc.details.get("nInserted", 0)
+            self.duplicates += len(errors)
+        finally:
+            self.slots.release()
+
+    async def close(self) -> None:
+        await self._flush()
+        await asyncio.gather(*list(self.tasks))
+
+
+def generate_zips(rng: random.Random, count: int) -> List[tuple]:
+    codes = sorted(rng.sample(range(90001, 96162), count))
+    return [(f"{code:05d}", rng.uniform(0.8, 1.4)) for code in codes]
+
+
+def generate_users(rng: random.Random, count: int, zips: List[tuple], hashed_password: str, anchor: datetime) -> Iterator[dict]:
+    for i in range(count):
+        is_host = i < max(1, int(count * HOST_SHARE))
+        yield {
+            "_id": _uuid(rng),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"user{i}@example.com",
+            "hashed_password": hashed_password,
+            "zipCode": rng.choice(zips)[0],
+            "isHost": is_host,
+            "phone": f"555-{rng.randint(0, 9999):04d}",
+            "createdAt": anchor - timedelta(days=rng.randint(30, 900)),
+            "backgroundCheckAccepted": is_host,
+            "verificationStatus": rng.choices(["verified", "pending", "unverified"], [0.6, 0.2, 0.2])[0],
+        }
+
+
+def generate_listing(rng: random.Random, host_id: str, zip_code: str, zip_factor: float, anchor: datetime) -> dict:
+    kind, indoor, image = rng.choice(KINDS)
+    adjective = rng.choice(ADJECTIVES)
+    size = rng.choices(["S", "M", "L"], [0.4, 0.4, 0.2])[0]
+    sqft = rng.randint(*SIZE_SQFT[size])
+    price = BasePrices[size] * zip_factor * rng.uniform(0.8, 1.3) + (15 if indoor else 0)
+    # Date fields are midnights, as the API stores them; only timestamps use `anchor`'s time.
+    today = datetime.combine(anchor.date(), datetime.min.time())
+    available_from = today - timedelta(days=rng.randint(120, 400))
+    return {
+        "_id": _uuid(rng),
+        "hostId": host_id,
+        "title": f"{adjective} {kind}",
+        "description": f"{adjective} {'indoor' if indoor else 'outdoor'} {kind.lower()} for {rng.choice(USES)} or {rng.choice(USES)}.",
+        "size": size,
+        "sizeSqft": sqft,
+        "pricePerMonth": float(round(price / 5) * 5),
+        "addressSummary": f"{zip_code} area",
+        "zipCode": zip_code,
+        "images": [image],
+        "availability": True,
+        "availableFrom": available_from,
+        "availableTo": today + timedelta(days=rng.randint(60, 365)),
+        "bookingDeadline": today + timedelta(days=rng.randint(7, 60)) if rng.random() < 0.2 else None,
+        "rating": round(rng.uniform(3.5, 5.0), 1),
+        "createdAt": available_from - timedelta(days=rng.randint(0, 30)),
+    }
+
+
+def generate_bookings(rng: random.Random, listing: dict, renters: List[str], anchor: datetime):
+    """Reservations, message threads and ledger days for one listing.
+
+    Reservations are laid out on `lanes` back-to-back tracks, each asking for at
+    most sizeSqft / lanes, so however they overlap no day is overbooked.
+    """
+    lanes = rng.randint(1, 4)
+    max_sqft = max(1, listing["sizeSqft"] // lanes)
+    count = rng.randint(*RESERVATIONS_PER_LISTING)
+    window_end = listing["availableTo"]
+    cursors = [listing["availableFrom"] + timedelta(days=rng.randint(0, 20)) for _ in range(lanes)]
+    today = datetime.combine(anchor.date(), datetime.min.time())
+    ledger: Dict[datetime, list] = {}
+    reservations, messages = [], []
+
+    for i in range(count):
+        lane = i % lanes
+        start = cursors[lane]
+        end = start + timedelta(days=rng.randint(3, 60))
+        if end > window_end:
+            continue
+        cursors[lane] = end + timedelta(days=rng.randint(0, 15))
+
+        if end <= anchor:
+            status = rng.choices(["confirmed", "declined", "expired"], [0.75, 0.15, 0.10])[0]
+        else:
+            status = rng.choices(["confirmed", "pending_host_confirmation", "declined"], [0.7, 0.2, 0.1])[0]
+        if status == "pending_host_confirmation":
+            # Recent requests, so most holds are still open and a few are due for the sweeper.
+            created = anchor - timedelta(hours=rng.randint(1, 36))
+        else:
+            created = min(start - timedelta(days=rng.randint(1, 30)), anchor - timedelta(hours=1))
+        sqft = rng.randint(max(1, max_sqft // 4), max_sqft)
+        insurance = rng.random() < 0.3
+        total, base, fee, insurance_cost = _calculate_costs(
+            listing["pricePerMonth"], listing["sizeSqft"], sqft, start, end, insurance
+        )
+        reservation = {
+            "_id": _uuid(rng),
+            "listingId": listing["_id"],
+            "renterId": rng.choice(renters),
+            "startDate": start,
+            "endDate": end,
+            "sqftRequested": sqft,
+            "status": status,
+            "basePrice": base,
+            "serviceFee": fee,
+            "insurance": insurance_cost,
+            "totalPrice": total,
+            "createdAt": created,
+            "paymentStatus": "mocked-success",
+            "holdExpiresAt": created + timedelta(hours=24),
+        }
+        reservations.append(reservation)
+
+        if status in ACTIVE_STATUSES and end > today:
+            for day in capacity._days(max(start, today), end):
+                entry = ledger.setdefault(day, [0, []])
+                entry[0] += sqft
+                entry[1].append(reservation["_id"])
+
+        if status != "declined" and rng.random() < 0.35:
+            sent = created
+            senders = [reservation["renterId"], listing["hostId"]]
+            for turn in range(rng.randint(1, 6)):
+                sent += timedelta(minutes=rng.randint(2, 600))
+                messages.append(
+                    {
+                        "_id": _uuid(rng),
+                        "reservationId": reservation["_id"],
+                        "senderId": senders[turn % 2],
+                        "content": MESSAGES[turn % len(MESSAGES)],
+                        "createdAt": sent,
+                    }
+                )
+
+    ledger_docs = [
+        {
+            "_id": ledger_key(listing["_id"], day),
+            "listingId": listing["_id"],
+            "day": day,
+            "reservedSqft": reserved,
+            "holds": holds,
+        }
+        for day, (reserved, holds) in sorted(ledger.items())
+    ]
+    return reservations, messages, ledger_docs
+
+
+def generate_documents(scale: int, seed_value: int, anchor: datetime) -> Iterator[Tuple[str, dict]]:
+    """(collection, document) pairs for a synthetic dataset, in dependency order."""
+    rng = random.Random(seed_value)
+    user_count = scale * USERS_PER_UNIT
+    listing_count = scale * LISTINGS_PER_UNIT
+    zips = generate_zips(rng, max(20, listing_count // 25))
+    zip_weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(zips))))
+    hashed_password = get_password_hash("password123")
+
+    hosts: List[str] = []
+    renters: List[str] = []
+    for user in generate_users(rng, user_count, zips, hashed_password, anchor):
+        (hosts if user["isHost"] else renters).append(user["_id"])
+        yield "users", user
+
+    for _ in range(listing_count):
+        zip_code, zip_factor = rng.choices(zips, cum_weights=zip_weights)[0]
+        listing = generate_listing(rng, rng.choice(hosts), zip_code, zip_factor, anchor)
+        yield "listings", listing
+        reservations, messages, ledger_docs = generate_bookings(rng, listing, renters, anchor)
+        for doc in reservations:
+            yield "reservations", doc
+        for doc in messages:
+            yield "messages", doc
+        for doc in ledger_docs:
+            yield LEDGER, doc
+
+
+async def generate(
+    scale: int,
+    seed_value: int,
+    anchor: datetime,
+    batch_size: int,
+    concurrency: int,
+    drop: bool,
+) -> None:
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.database_name]
+    if drop:
+        for name in GENERATED_COLLECTIONS:
+            await db[name].drop()
+
+    slots = asyncio.Semaphore(concurrency)
+    writers = {name: BatchWriter(db[name], batch_size, slots) for name in GENERATED_COLLECTIONS[:-1]}
+    started = time.perf_counter()
+    for name, doc in generate_documents(scale, seed_value, anchor):
+        await writers[name].add(doc)
+
+    for writer in writers.values():
+        await writer.close()
+    loaded = time.perf_counter() - started
+    for name, writer in writers.items():
+        skipped = f" ({writer.duplicates} already present)" if writer.duplicates else ""
+        print(f"{name}: {writer.inserted} inserted{skipped}")
+    print(f"Loaded in {loaded:.1f}s; building indexes and pricing statistics...")
+
+    await ensure_indexes(db)
+    cells = await pricing_stats.rebuild(MongoRepositories(db))
+    print(f"Done in {time.perf_counter() - started:.1f}s ({cells} pricing cells).")
+    print("Every generated user can log in as user<N>@example.com / password123 (user0 is a host).")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Seed the Spacio database")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=0,
+        help="generate synthetic data: 100 users, 50 listings and ~1,000 reservations per unit",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="random seed for --scale (default 42)")
+    parser.add_argument(
+        "--anchor",
+        type=date.fromisoformat,
+        default=None,
+        help="date the generated data is centred on, YYYY-MM-DD (default today)",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per insert_many")
+    parser.add_argument("--concurrency", type=int, default=8, help="insert_many batches in flight")
+    parser.add_argument("--drop", action="store_true", help="drop generated collections first")
+    args = parser.parse_args(argv)
+
+    if args.scale <= 0:
+        asyncio.run(seed())
+        return
+    anchor_day = args.anchor or datetime.utcnow().date()
+    anchor = datetime.combine(anchor_day, datetime.min.time()) + timedelta(hours=12)
+    asyncio.run(generate(args.scale, args.seed, anchor, args.batch_size, args.concurrency, args.drop))
+
+
 if __name__ == "__main__":
-    asyncio.run(seed())
+    main()
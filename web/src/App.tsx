@@ -1,12 +1,14 @@
 import { useEffect, useMemo, useState } from "react";
 import { Link, Navigate, Route, Routes, useNavigate } from "react-router-dom";
 import {
+  useInfiniteQuery,
   useMutation,
   useQuery,
   useQueryClient,
 } from "@tanstack/react-query";
 import type { Listing, Message, Reservation, StorageSize } from "./types";
 import { useAuth } from "./hooks/useAuth";
+import { useMessageStream } from "./hooks/useMessageStream";
 import * as listingApi from "./api/listings";
 import * as reservationApi from "./api/reservations";
 import * as messageApi from "./api/messages";
@@ -16,24 +18,44 @@ import * as verificationApi from "./api/verification";
 
 const sizes: StorageSize[] = ["S", "M", "L"];
 
-function getListingImage(listing: Listing | undefined, fallbackIndex: number = 0): string {
-  if (listing?.images?.[0]) {
-    return listing.images[0].startsWith('/') 
-      ? `http://127.0.0.1:8000${listing.images[0]}` 
-      : listing.images[0];
+const API_ORIGIN = "http://127.0.0.1:8000";
+const IMAGE_WIDTHS = [160, 320, 640, 1024];
+
+// Local images are served in fixed widths from /images/{id}/{width}; Unsplash takes a w= param.
+function resizedImage(url: string, width: number): string {
+  const local = url.match(/^(?:https?:\/\/127\.0\.0\.1:8000)?\/(?:uploads|images)\/([A-Za-z0-9_-]+)\.(?:jpe?g|png|webp)$/);
+  if (local) {
+    return `${API_ORIGIN}/images/${local[1]}/${width}`;
   }
-  
-  const text = `${listing?.title || ''} ${listing?.description || ''}`.toLowerCase();
-  if (text.includes('closet') || text.includes('room') || text.includes('indoor') || text.includes('nook')) {
-    return "http://127.0.0.1:8000/images/closet-img.webp";
+  if (url.startsWith("https://images.unsplash.com/")) {
+    const resized = new URL(url);
+    resized.searchParams.set("w", String(width));
+    return resized.toString();
   }
-  if (text.includes('garage') || text.includes('parking') || text.includes('outdoor')) {
-    return "http://127.0.0.1:8000/images/garage-img.jpg";
+  return url;
+}
+
+function getListingImage(listing: Listing | undefined, fallbackIndex: number = 0, width?: number): string {
+  let url: string;
+  const text = `${listing?.title || ''} ${listing?.description || ''}`.toLowerCase();
+  if (listing?.images?.[0]) {
+    url = listing.images[0].startsWith('/') 
+      ? `${API_ORIGIN}${listing.images[0]}` 
+      : listing.images[0];
+  } else if (text.includes('closet') || text.includes('room') || text.includes('indoor') || text.includes('nook')) {
+    url = `${API_ORIGIN}/images/closet-img.webp`;
+  } else if (text.includes('garage') || text.includes('parking') || text.includes('outdoor')) {
+    url = `${API_ORIGIN}/images/garage-img.jpg`;
+  } else {
+    url = fallbackIndex % 2 === 0 
+      ? `${API_ORIGIN}/images/garage-img.jpg`
+      : `${API_ORIGIN}/images/closet-img.webp`;
   }
-  
-  return fallbackIndex % 2 === 0 
-    ? "http://127.0.0.1:8000/images/garage-img.jpg"
-    : "http://127.0.0.1:8000/images/closet-img.webp";
+  return width ? resizedImage(url, width) : url;
+}
+
+function getListingSrcSet(listing: Listing | undefined, fallbackIndex: number = 0): string {
+  return IMAGE_WIDTHS.map((w) => `${getListingImage(listing, fallbackIndex, w)} ${w}w`).join(", ");
 }
 
 function Nav() {
@@ -153,11 +175,23 @@ function Landing() {
   
   const shouldSearch = (filters.zipCode?.length ?? 0) >= 1;
   
-  const { data: listings = [], isLoading } = useQuery({
+  const {
+    data: listingPages,
+    isLoading,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ["listings", filters],
-    queryFn: () => listingApi.fetchListings(filters),
+    queryFn: ({ pageParam }) => listingApi.fetchListings({ ...filters, cursor: pageParam }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (page) => page.nextCursor ?? undefined,
     enabled: shouldSearch,
   });
+  const listings = useMemo(
+    () => listingPages?.pages.flatMap((page) => page.items) ?? [],
+    [listingPages]
+  );
 
   useEffect(() => {
     const urlParams = new URLSearchParams(window.location.search);
@@ -289,7 +323,7 @@ function Landing() {
             <div className="flex items-center justify-between mb-6">
               <div>
                 <h2 className="text-2xl font-bold text-slate-900">
-                  {isLoading ? "Searching..." : `${listings.length} ${listings.length === 1 ? 'space' : 'spaces'} available`}
+                  {isLoading ? "Searching..." : `${listings.length}${hasNextPage ? "+" : ""} ${listings.length === 1 ? 'space' : 'spaces'} available`}
                 </h2>
                 <p className="text-slate-600">
                   {filters.zipCode && `matching "${filters.zipCode}"`}
@@ -316,9 +350,10 @@ function Landing() {
                 <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-brand-600"></div>
               </div>
             ) : listings.length > 0 ? (
+              <>
               <div className="grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
                 {listings.map((listing, index) => {
-                  const imageUrl = getListingImage(listing, index);
+                  const imageUrl = getListingImage(listing, index, 640);
                   
                   return (
                     <div
@@ -329,10 +364,15 @@ function Landing() {
                       <div className="relative aspect-[4/3] overflow-hidden rounded-2xl bg-slate-100">
                         <img
                           src={imageUrl}
+                          srcSet={getListingSrcSet(listing, index)}
+                          sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                          loading="lazy"
                           alt={listing.title}
                           className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-105"
                           onError={(e) => {
-                            (e.target as HTMLImageElement).src = "http://127.0.0.1:8000/images/garage-img.jpg";
+                            const img = e.target as HTMLImageElement;
+                            img.srcset = "";
+                            img.src = `${API_ORIGIN}/images/garage-img.jpg`;
                           }}
                         />
                         {listing.hostVerified && (
@@ -377,6 +417,18 @@ function Landing() {
                   );
                 })}
               </div>
+              {hasNextPage && (
+                <div className="mt-8 flex justify-center">
+                  <button
+                    onClick={() => fetchNextPage()}
+                    disabled={isFetchingNextPage}
+                    className="rounded-full border border-slate-200 bg-white px-6 py-2 text-sm font-medium shadow-sm hover:shadow transition disabled:opacity-60"
+                  >
+                    {isFetchingNextPage ? "Loading..." : "Show more spaces"}
+                  </button>
+                </div>
+              )}
+              </>
             ) : (
               <div className="text-center py-12">
                 <svg className="mx-auto h-12 w-12 text-slate-300" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -690,7 +742,7 @@ function ListingDetailModal({
               </p>
             )}
             <img
-              src={getListingImage(listing)}
+              src={getListingImage(listing, 0, 640)}
               alt={listing.title}
               className="mt-3 h-32 w-full rounded-lg object-cover"
             />
@@ -1238,6 +1290,7 @@ function ReservationCard({
     queryFn: () => messageApi.listMessages(reservation._id),
     enabled: showMessages,
   });
+  useMessageStream(reservation._id, showMessages);
   const send = useMutation({
     mutationFn: (content: string) =>
       messageApi.sendMessage({ reservationId: reservation._id, content }),
@@ -1450,7 +1503,7 @@ function VerificationCard() {
 function HostDashboard() {
   const { data: myListings = [], isLoading: loadingMy } = useQuery({
     queryKey: ["my-listings"],
-    queryFn: listingApi.fetchMyListings,
+    queryFn: () => listingApi.fetchMyListings(),
   });
   const queryClient = useQueryClient();
   const [editingId, setEditingId] = useState<string | null>(null);
@@ -1967,8 +2020,8 @@ function ProfileReservationCard({ reservation }: { reservation: Reservation }) {
     queryKey: ["messages", reservation._id],
     queryFn: () => messageApi.listMessages(reservation._id),
     enabled: showChat,
-    refetchInterval: showChat ? 3000 : false, // Poll for new messages when chat is open
   });
+  useMessageStream(reservation._id, showChat);
 
   const sendMsg = useMutation({
     mutationFn: (content: string) =>
@@ -1998,7 +2051,7 @@ function ProfileReservationCard({ reservation }: { reservation: Reservation }) {
         onClick={() => setShowChat(true)}
       >
         <img
-          src={getListingImage(listing)}
+          src={getListingImage(listing, 0, 320)}
           alt={listing?.title || "Storage space"}
           className="h-24 w-24 rounded-lg object-cover flex-shrink-0"
         />
@@ -2180,7 +2233,7 @@ function AiMatchPage() {
                 >
                   <div
                     className="h-32 w-full bg-cover bg-center"
-                    style={{ backgroundImage: `url(${getListingImage(listing)})` }}
+                    style={{ backgroundImage: `url(${getListingImage(listing, 0, 640)})` }}
                   />
                   <div className="p-4">
                     <div className="flex items-center justify-between text-xs text-slate-500">
@@ -1,5 +1,5 @@
 import api from "./client";
-import type { Listing, StorageSize } from "../types";
+import type { Listing, Page, StorageSize } from "../types";
 
 export async function fetchListings(params: {
   zipCode?: string;
@@ -8,8 +8,10 @@ export async function fetchListings(params: {
   priceMin?: number;
   priceMax?: number;
   size?: StorageSize;
+  cursor?: string;
+  limit?: number;
 }) {
-  const { data } = await api.get<Listing[]>("/listings", { params });
+  const { data } = await api.get<Page<Listing>>("/listings", { params });
   return data;
 }
 
@@ -35,11 +37,24 @@ export async function createListing(payload: {
   return data;
 }
 
-export async function fetchMyListings() {
-  const { data } = await api.get<Listing[]>("/listings/mine");
+export async function fetchMyListingPage(params: { cursor?: string; limit?: number } = {}) {
+  const { data } = await api.get<Page<Listing>>("/listings/mine", { params });
   return data;
 }
 
+const MY_LISTINGS_PAGE_LIMIT = 200;
+
+// Every listing the host owns: follows `nextCursor` until the last page.
+export async function fetchMyListings() {
+  let page = await fetchMyListingPage({ limit: MY_LISTINGS_PAGE_LIMIT });
+  const pages = [page.items];
+  while (page.nextCursor) {
+    page = await fetchMyListingPage({ cursor: page.nextCursor, limit: MY_LISTINGS_PAGE_LIMIT });
+    pages.push(page.items);
+  }
+  return pages.flat();
+}
+
 export async function updateListing(
   id: string,
   payload: Partial<{
@@ -1,11 +1,31 @@
 import api from "./client";
-import type { Message } from "../types";
+import type { Message, MessagePage } from "../types";
 
-export async function listMessages(reservationId: string) {
-  const { data } = await api.get<Message[]>(`/messages/${reservationId}`);
+export async function fetchMessagePage(
+  reservationId: string,
+  params: { since?: string; before?: string; limit?: number } = {}
+) {
+  const { data } = await api.get<MessagePage>(`/messages/${reservationId}`, { params });
   return data;
 }
 
+const HISTORY_PAGE_LIMIT = 200;
+
+// Whole thread, oldest first: walks back through `before` cursors until the
+// server reports no older page.
+export async function listMessages(reservationId: string) {
+  let page = await fetchMessagePage(reservationId, { limit: HISTORY_PAGE_LIMIT });
+  const pages = [page.items];
+  while (page.prevCursor) {
+    page = await fetchMessagePage(reservationId, {
+      before: page.prevCursor,
+      limit: HISTORY_PAGE_LIMIT,
+    });
+    pages.unshift(page.items);
+  }
+  return pages.flat();
+}
+
 export async function sendMessage(payload: {
   reservationId: string;
   content: string;
@@ -14,3 +34,66 @@ export async function sendMessage(payload: {
   return data;
 }
 
+const MAX_RECONNECT_DELAY_MS = 30000;
+
+export function subscribeMessages(
+  reservationId: string,
+  onMessages: (messages: Message[]) => void
+) {
+  const base = (api.defaults.baseURL || "").replace(/^http/, "ws");
+  const url = `${base}/messages/${reservationId}/ws`;
+  let socket: WebSocket | null = null;
+  let cursor: string | undefined;
+  let attempts = 0;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  // Messages sent while no socket was open only reach us through REST: once
+  // the server is subscribed (its `ready` frame), read everything after the
+  // last cursor we saw, or the newest page the first time.
+  async function catchUp() {
+    for (;;) {
+      const since = cursor;
+      const page = await fetchMessagePage(reservationId, { since, limit: HISTORY_PAGE_LIMIT });
+      if (closed) return;
+      if (page.items.length) onMessages(page.items);
+      cursor = page.nextCursor ?? cursor;
+      if (!since || page.items.length < HISTORY_PAGE_LIMIT) return;
+    }
+  }
+
+  function connect() {
+    const current = new WebSocket(url);
+    socket = current;
+    // The token goes in the first frame rather than the URL, which ends up in
+    // server and proxy logs.
+    current.onopen = () => {
+      const token = localStorage.getItem("spacio_token") || "";
+      current.send(JSON.stringify({ type: "auth", token }));
+    };
+    current.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "ready") {
+        attempts = 0;
+        catchUp().catch(() => current.close());
+      } else {
+        onMessages([data]);
+      }
+    };
+    current.onerror = () => current.close();
+    current.onclose = (event) => {
+      if (socket === current) socket = null;
+      // 1008: the server refused the token or reservation; retrying won't help.
+      if (closed || event.code === 1008) return;
+      const delay = Math.min(MAX_RECONNECT_DELAY_MS, 1000 * 2 ** attempts++);
+      retry = setTimeout(connect, delay);
+    };
+  }
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    socket?.close();
+  };
+}
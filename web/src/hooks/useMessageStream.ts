@@ -0,0 +1,28 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import * as messageApi from "../api/messages";
+import type { Message } from "../types";
+
+function mergeMessages(prev: Message[], incoming: Message[]) {
+  const known = new Set(prev.map((m) => m._id));
+  const added = incoming.filter((m) => !known.has(m._id));
+  if (!added.length) return prev;
+  return [...prev, ...added].sort((a, b) =>
+    a.createdAt === b.createdAt
+      ? a._id.localeCompare(b._id)
+      : a.createdAt.localeCompare(b.createdAt)
+  );
+}
+
+export function useMessageStream(reservationId: string, enabled: boolean) {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled) return;
+    return messageApi.subscribeMessages(reservationId, (messages) => {
+      queryClient.setQueryData<Message[]>(["messages", reservationId], (prev = []) =>
+        mergeMessages(prev, messages)
+      );
+    });
+  }, [reservationId, enabled, queryClient]);
+}
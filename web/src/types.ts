@@ -55,3 +55,14 @@ export type User = {
   verificationStatus?: string;
 };
 
+
+export type Page<T> = {
+  items: T[];
+  nextCursor: string | null;
+};
+
+export type MessagePage = {
+  items: Message[];
+  prevCursor: string | null;
+  nextCursor: string | null;
+};